@@ -1,5 +1,3 @@
-import json
-import os
 from datetime import datetime
 from kivymd.uix.screen import MDScreen
 from kivymd.uix.textfield import MDTextField
@@ -10,8 +8,10 @@ from kivymd.uix.card import MDCard
 from kivymd.uix.dialog import MDDialog
 from kivymd.uix.snackbar import Snackbar
 from kivy.uix.anchorlayout import AnchorLayout
-
-DATA_FILE = os.path.join("data", "reminders.json")
+from kivymd.app import MDApp
+from kivy.clock import Clock
+from recurrence import make_reminder
+from medicine_names import SUGGESTION_LIMIT
 
 class AddReminderScreen(MDScreen):
     def __init__(self, **kwargs):
@@ -25,7 +25,7 @@ class AddReminderScreen(MDScreen):
             orientation="vertical",
             radius=[15],
             size_hint=(0.9, None),
-            height=420,
+            height=600,
             elevation=5,
             spacing=20,
         )
@@ -33,6 +33,15 @@ class AddReminderScreen(MDScreen):
         form_card.add_widget(MDLabel(text="Add Reminder", halign="center", font_style="H5"))
 
         self.medicine_input = MDTextField(hint_text="Medicine Name", mode="rectangle")
+        self.medicine_input.bind(text=self.on_medicine_text)
+
+        # Name suggestions; the buttons are reused, only their text changes
+        self.suggestion_row = MDBoxLayout(orientation="horizontal", spacing=10, size_hint_y=None, height=36)
+        self.suggestion_btns = []
+        for i in range(SUGGESTION_LIMIT):
+            btn = MDFlatButton(text="", opacity=0, disabled=True, on_release=self.pick_suggestion)
+            self.suggestion_btns.append(btn)
+            self.suggestion_row.add_widget(btn)
         self.time_input = MDTextField(hint_text="Time (e.g., 8:00 AM)", mode="rectangle")
 
         today = datetime.now().strftime("%Y-%m-%d")
@@ -42,9 +51,15 @@ class AddReminderScreen(MDScreen):
             mode="rectangle"
         )
 
+        self.repeat_input = MDTextField(hint_text="Repeat (daily, every 8 hours, mon,wed,fri)", mode="rectangle")
+        self.course_input = MDTextField(hint_text="Course length in days (optional)", mode="rectangle")
+
         form_card.add_widget(self.medicine_input)
+        form_card.add_widget(self.suggestion_row)
         form_card.add_widget(self.time_input)
         form_card.add_widget(self.date_input)
+        form_card.add_widget(self.repeat_input)
+        form_card.add_widget(self.course_input)
 
         button_layout = MDBoxLayout(orientation="horizontal", spacing=20, size_hint_y=None, height=60)
         save_btn = MDRaisedButton(text="Save Reminder", on_release=self.save_reminder)
@@ -56,6 +71,21 @@ class AddReminderScreen(MDScreen):
         anchor_layout.add_widget(form_card)
         self.add_widget(anchor_layout)
 
+    def on_enter(self, *args):
+        # Build the name index now rather than on the first keystroke
+        Clock.schedule_once(lambda dt: MDApp.get_running_app().medicine_names.warm())
+
+    def on_medicine_text(self, instance, text):
+        names = MDApp.get_running_app().medicine_names.suggest(text) if instance.focus else []
+        for i, btn in enumerate(self.suggestion_btns):
+            btn.text = names[i] if i < len(names) else ""
+            btn.opacity = 1 if i < len(names) else 0
+            btn.disabled = i >= len(names)
+
+    def pick_suggestion(self, btn):
+        self.medicine_input.text = btn.text
+        self.on_medicine_text(self.medicine_input, "")
+
     def show_success_dialog(self):
         if self.success_dialog:
             self.success_dialog.dismiss()
@@ -69,42 +99,28 @@ class AddReminderScreen(MDScreen):
         self.success_dialog.open()
 
     def save_reminder(self, instance):
-        med = self.medicine_input.text.strip()
-        time = self.time_input.text.strip()
-        date_text = self.date_input.text.strip()
-
-        if not med or not time or not date_text:
-            Snackbar(text="⚠️ Please fill in all fields", duration=2).open()
-            return
-
         try:
-            datetime.strptime(date_text, "%Y-%m-%d")
-        except ValueError:
-            Snackbar(text="⚠️ Invalid date format. Use YYYY-MM-DD", duration=2).open()
+            reminder = make_reminder(
+                self.medicine_input.text,
+                self.time_input.text,
+                self.date_input.text,
+                self.repeat_input.text,
+                self.course_input.text
+            )
+        except ValueError as e:
+            Snackbar(text=f"⚠️ {e}", duration=2).open()
             return
 
-        reminder = {
-            "medicine": med,
-            "time": time,
-            "date": date_text
-        }
-
-        if os.path.exists(DATA_FILE):
-            with open(DATA_FILE, "r") as f:
-                try:
-                    data = json.load(f)
-                except json.JSONDecodeError:
-                    data = []
-        else:
-            data = []
-
-        data.append(reminder)
-        with open(DATA_FILE, "w") as f:
-            json.dump(data, f, indent=4)
+        # "paracetamol " is saved as the "Paracetamol" already in use, so tracker keys match
+        app = MDApp.get_running_app()
+        reminder["medicine"] = app.medicine_names.canonical(reminder["medicine"])
+        app.store.add_reminder(reminder)
 
         self.medicine_input.text = ""
         self.time_input.text = ""
         self.date_input.text = datetime.now().strftime("%Y-%m-%d")
+        self.repeat_input.text = ""
+        self.course_input.text = ""
 
         self.show_success_dialog()
 
@@ -0,0 +1,138 @@
+import math
+from kivymd.uix.screen import MDScreen
+from kivymd.uix.boxlayout import MDBoxLayout
+from kivymd.uix.label import MDLabel
+from kivymd.uix.card import MDCard
+from kivymd.uix.button import MDRaisedButton
+from kivymd.uix.scrollview import MDScrollView
+from kivymd.uix.anchorlayout import MDAnchorLayout
+from kivy.metrics import dp
+from kivy.app import App
+from recurrence import WEEKDAYS
+
+
+def percent(rate):
+    return "–" if rate is None or math.isnan(rate) else f"{rate * 100:.0f}%"
+
+
+class AdherenceScreen(MDScreen):
+    # Tracker sub-view with long-term stats; AdherenceAnalytics keeps the
+    # last result and only recomputes after new marks.
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.built = False
+        self.analytics = None
+        self.shown = None
+
+    def on_pre_enter(self):
+        if not self.built:
+            self.build_ui()
+            self.built = True
+        if self.analytics is None:
+            # NumPy is only imported once someone opens the stats; it is an
+            # optional dependency, so the screen says so if it is missing
+            try:
+                from analytics import AdherenceAnalytics
+            except ImportError as e:
+                print("⚠️ Adherence stats unavailable:", e)
+                self.show_message("Stats need NumPy (pip install numpy).")
+                return
+            self.analytics = AdherenceAnalytics(App.get_running_app().store)
+        # History is read and crunched off the UI thread once the store is loaded
+        store = App.get_running_app().store
+        store.when_loaded(lambda: self.analytics.load(self.show_stats))
+
+    def build_ui(self):
+        main = MDBoxLayout(orientation="vertical", padding=dp(20), spacing=dp(15))
+
+        main.add_widget(MDLabel(
+            text="Adherence",
+            halign="center",
+            font_style="H5",
+            theme_text_color="Primary",
+            size_hint_y=None,
+            height=dp(40)
+        ))
+
+        overall_card = MDCard(orientation="vertical", padding=dp(15), radius=[dp(15)], elevation=5, size_hint_y=None, height=dp(100))
+        overall_card.add_widget(MDLabel(text="Overall", halign="center", theme_text_color="Primary"))
+        self.overall_label = MDLabel(text="–", halign="center", font_style="H4", theme_text_color="Primary")
+        overall_card.add_widget(self.overall_label)
+        main.add_widget(overall_card)
+
+        scroll = MDScrollView()
+        self.stats_box = MDBoxLayout(orientation="vertical", spacing=dp(8), size_hint_y=None)
+        self.stats_box.bind(minimum_height=self.stats_box.setter("height"))
+        scroll.add_widget(self.stats_box)
+        main.add_widget(scroll)
+
+        back_container = MDAnchorLayout(anchor_x="center", anchor_y="center", size_hint_y=None, height=dp(70))
+        back_container.add_widget(MDRaisedButton(
+            text="Back",
+            on_release=lambda x: self.go_back(),
+            size_hint=(None, None),
+            size=(dp(100), dp(50))
+        ))
+        main.add_widget(back_container)
+
+        self.add_widget(main)
+
+    def section(self, title):
+        self.stats_box.add_widget(MDLabel(
+            text=title,
+            font_style="H6",
+            bold=True,
+            theme_text_color="Primary",
+            size_hint_y=None,
+            height=dp(36)
+        ))
+
+    def line(self, text):
+        self.stats_box.add_widget(MDLabel(
+            text=text,
+            theme_text_color="Secondary",
+            size_hint_y=None,
+            height=dp(28)
+        ))
+
+    def show_message(self, text):
+        self.stats_box.clear_widgets()
+        self.overall_label.text = "–"
+        self.line(text)
+
+    def show_stats(self, stats):
+        if stats is self.shown and self.stats_box.children:
+            return
+        self.shown = stats
+
+        if stats is None:
+            self.show_message("No doses have been marked yet.")
+            return
+        self.stats_box.clear_widgets()
+
+        self.overall_label.text = percent(stats["overall"])
+
+        self.section("By medicine")
+        for i, name in enumerate(stats["medicines"]):
+            self.line(
+                f"{name}: {percent(stats['adherence'][i])}, "
+                f"best streak {int(stats['streaks'][i])} days, "
+                f"{int(stats['clusters'][i])} missed runs"
+            )
+
+        self.section("Weekly trend")
+        for week, rate in stats["weekly"]:
+            self.line(f"Week of {week}: {percent(rate)}")
+
+        self.section("Monthly trend")
+        for month, rate in stats["monthly"]:
+            self.line(f"{month}: {percent(rate)}")
+
+        missed = stats["missed_by_weekday"]
+        if missed.sum() > 0:
+            self.section("Most missed")
+            worst = sorted(range(7), key=lambda d: -missed[d])[:3]
+            self.line(", ".join(f"{WEEKDAYS[d].capitalize()} ({int(missed[d])})" for d in worst if missed[d] > 0))
+
+    def go_back(self):
+        App.get_running_app().root.go_back()
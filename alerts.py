@@ -0,0 +1,196 @@
+import os
+import queue
+import threading
+import time
+import wave
+
+from events import EventSource, Timer
+from store import DATA_DIR
+
+SOUND_FILE = "reminder.wav"
+# A 16-bit mono copy of SOUND_FILE at no more than this rate is cached under
+# data/cache and played instead; the original is 24-bit stereo at 48 kHz
+LIGHT_SOUND_RATE = 24000
+# Lines listed in a digest notification before "and N more"
+DIGEST_LINES = 5
+
+
+def dose_label(occ):
+    # "Aspirin", or "Aspirin (Grandma)" when several patients are managed
+    return f"{occ.medicine} ({occ.patient})" if occ.patient else occ.medicine
+
+
+def group_by_time(doses):
+    # [(time_str, [medicine, ...]), ...] in dose order
+    groups = {}
+    for occ in sorted(doses, key=lambda occ: occ.at):
+        groups.setdefault((occ.at, occ.time_str), []).append(dose_label(occ))
+    return [(time_str, medicines) for (at, time_str), medicines in groups.items()]
+
+
+def digest_text(doses):
+    # One (title, message) for any number of doses
+    if len(doses) == 1:
+        occ = doses[0]
+        if occ.patient:
+            return "Medicine Reminder", f"Time for {occ.patient} to take {occ.medicine} ({occ.time_str})"
+        return "Medicine Reminder", f"Time to take {occ.medicine} ({occ.time_str})"
+    lines = [f"{time_str}: {', '.join(medicines)}" for time_str, medicines in group_by_time(doses)]
+    if len(lines) > DIGEST_LINES:
+        lines = lines[:DIGEST_LINES - 1] + [f"and {len(lines) - DIGEST_LINES + 1} more times"]
+    return f"{len(doses)} medicines due", "\n".join(lines)
+
+
+def transcode_light(src, dst, max_rate=LIGHT_SOUND_RATE):
+    # Keeps the top 16 bits of the first channel of every n-th frame. WAV
+    # samples are little-endian, so that is plain byte slicing, no decoding.
+    with wave.open(src, "rb") as w:
+        channels, width, rate = w.getnchannels(), w.getsampwidth(), w.getframerate()
+        raw = w.readframes(w.getnframes())
+    if width < 2:
+        return False
+
+    step = max(rate // max_rate, 1)
+    stride = width * channels * step
+    low, high = raw[width - 2::stride], raw[width - 1::stride]
+    count = min(len(low), len(high))
+    samples = bytearray(count * 2)
+    samples[0::2] = low[:count]
+    samples[1::2] = high[:count]
+
+    os.makedirs(os.path.dirname(dst), exist_ok=True)
+    tmp = f"{dst}.tmp"
+    with wave.open(tmp, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(rate // step)
+        w.writeframes(bytes(samples))
+    os.replace(tmp, dst)
+    return True
+
+
+class AlertService(EventSource):
+    # App-wide reminder alerts. The sound is prepared and loaded once, and
+    # vibration and system notifications (plyer calls that can block) run on
+    # a worker thread fed by a queue, so raising an alert never stalls a
+    # frame. Also holds the doses waiting behind the dashboard bell;
+    # listeners hear "pending" when that list changes.
+    def __init__(self, store, schedule, sound_file=SOUND_FILE):
+        # schedule(callback, delay) -> runs callback on the main thread, e.g. Clock.schedule_once
+        super().__init__()
+        self.store = store
+        self.schedule = schedule
+        self.sound_file = sound_file
+        # Shared by every patient profile, so not under store.data_dir
+        self.light_file = os.path.join(DATA_DIR, "cache", "reminder_light.wav")
+        self.sound = None
+        self.jobs = queue.Queue()
+        self.thread = None
+        self.pending = []
+        # Doses waiting for the next digest, and when the last alert went out
+        self.batch = []
+        self.last_alert = None
+        self.digest_timer = Timer(schedule)
+
+    def start(self):
+        self.thread = threading.Thread(target=self.run, name="alerts", daemon=True)
+        self.thread.start()
+        self.jobs.put(self.prepare_sound)
+
+    def stop(self):
+        self.digest_timer.cancel()
+        if self.thread is not None:
+            self.jobs.put(None)
+            self.thread.join(timeout=2)
+            self.thread = None
+
+    def run(self):
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                return
+            try:
+                job()
+            except Exception as e:
+                print("⚠️ Alert failed:", e)
+
+    # === Sound ===
+    def prepare_sound(self):
+        # Worker thread: (re)build the light copy if the original is newer
+        path = self.sound_file
+        try:
+            if (os.path.exists(self.light_file)
+                    and os.path.getmtime(self.light_file) >= os.path.getmtime(self.sound_file)):
+                path = self.light_file
+            elif transcode_light(self.sound_file, self.light_file):
+                path = self.light_file
+        except (OSError, EOFError, wave.Error) as e:
+            print("⚠️ Using the original reminder sound:", e)
+        self.schedule(lambda dt: self.load_sound(path), 0)
+
+    def load_sound(self, path):
+        from kivy.core.audio import SoundLoader
+        self.sound = SoundLoader.load(path)
+
+    def play_sound(self):
+        if self.sound is not None:
+            self.sound.stop()
+            self.sound.play()
+
+    # === Platform calls ===
+    def vibrate(self):
+        self.jobs.put(self._vibrate)
+
+    def notify(self, title, message):
+        self.jobs.put(lambda: self._notify(title, message))
+
+    # Worker thread
+    def _vibrate(self):
+        from plyer import vibrator
+        try:
+            vibrator.vibrate(time=0.5)
+        except NotImplementedError:
+            pass
+
+    def _notify(self, title, message):
+        from plyer import notification
+        notification.notify(title=title, message=message, timeout=5)
+
+    # === Alerts ===
+    def alert(self, title, message):
+        # Honours the Sound / Vibration / Notifications switches in Settings
+        settings = self.store.settings()
+        if settings.get("sound", True):
+            self.play_sound()
+        if settings.get("vibration", True):
+            self.vibrate()
+        if settings.get("notifications", True):
+            self.notify(title, message)
+
+    def on_reminders_due(self, due):
+        # Scheduler callback with a list of Occurrence. Doses are collected
+        # for the digest window (and until the last alert is old enough), then
+        # sent as one alert, however many share the time slot.
+        keys = {occ.notification_key for occ in self.pending}
+        fresh = [occ for occ in due if occ.notification_key not in keys]
+        if not fresh:
+            return
+        self.pending.extend(fresh)
+        self.batch.extend(fresh)
+        if not self.digest_timer.pending:
+            settings = self.store.settings()
+            delay = settings.get("digest_window", 0)
+            if self.last_alert is not None:
+                delay = max(delay, self.last_alert + settings.get("alert_interval", 0) - time.monotonic())
+            self.digest_timer.start(self.send_digest, delay)
+        self.dispatch("pending")
+
+    def send_digest(self, *args):
+        batch, self.batch = self.batch, []
+        if batch:
+            self.last_alert = time.monotonic()
+            self.alert(*digest_text(batch))
+
+    def clear_pending(self):
+        self.pending.clear()
+        self.dispatch("pending")
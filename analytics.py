@@ -0,0 +1,174 @@
+import numpy as np
+
+from timeutil import parse_time
+
+STATUS_CODES = {"taken": 0, "missed": 1}
+# Trend windows shown in the stats view
+TREND_WEEKS = 8
+TREND_MONTHS = 6
+
+
+def dose_medicine(dose):
+    # Recurring doses are tracked as "{medicine}_{time}"; one-offs as the name
+    medicine, sep, time_str = dose.rpartition("_")
+    if sep and parse_time(time_str) is not None:
+        return medicine
+    return dose
+
+
+def _rate(taken, missed):
+    # taken / (taken + missed) with NaN where nothing was recorded
+    total = taken + missed
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(total > 0, taken / np.maximum(total, 1), np.nan)
+
+
+def history_arrays(day_items):
+    # day_items: iterable of (date, {dose: status}) from the tracker history.
+    # Returns (first_day, medicines, taken, missed) where taken/missed are
+    # int32 arrays of shape (days, medicines) counting doses per day.
+    # Strings are coded to ints in plain dicts first (NumPy string arrays are
+    # slow to build); every distinct date and dose is then parsed only once.
+    dates, dose_codes = [], {}
+    day_code, dose_code, status = [], [], []
+    for date, doses in day_items:
+        if not doses:
+            continue
+        day_code.extend([len(dates)] * len(doses))
+        dates.append(date)
+        for dose, dose_status in doses.items():
+            dose_code.append(dose_codes.setdefault(dose, len(dose_codes)))
+            status.append(STATUS_CODES.get(dose_status, -1))
+    if not dates:
+        empty = np.zeros((0, 0), dtype=np.int32)
+        return None, [], empty, empty.copy()
+
+    day_values = np.array(dates, dtype="datetime64[D]")
+    first_day = day_values.min()
+    day_index = (day_values - first_day).astype(np.int64)[np.array(day_code)]
+    status = np.array(status)
+
+    names, dose_medicine_index = np.unique([dose_medicine(d) for d in dose_codes], return_inverse=True)
+    med_index = dose_medicine_index[np.array(dose_code)]
+
+    shape = (int(day_index.max()) + 1, len(names))
+    taken = np.zeros(shape, dtype=np.int32)
+    missed = np.zeros(shape, dtype=np.int32)
+    is_taken = status == 0
+    is_missed = status == 1
+    np.add.at(taken, (day_index[is_taken], med_index[is_taken]), 1)
+    np.add.at(missed, (day_index[is_missed], med_index[is_missed]), 1)
+    return first_day, names.tolist(), taken, missed
+
+
+def longest_streaks(taken, missed):
+    # Longest run of days per medicine with every recorded dose taken. Days
+    # without any record neither extend nor break a streak.
+    good = ((taken > 0) & (missed == 0)).astype(np.int32)
+    bad = missed > 0
+    run = np.cumsum(good, axis=0)
+    # Subtract the count reached at the most recent missed day
+    reset = np.maximum.accumulate(np.where(bad, run, 0), axis=0)
+    streak = run - reset
+    return streak.max(axis=0) if len(streak) else np.zeros(taken.shape[1], dtype=np.int32)
+
+
+def missed_clusters(missed):
+    # Number of separate runs of consecutive missed days per medicine
+    bad = missed > 0
+    starts = bad.copy()
+    starts[1:] &= ~bad[:-1]
+    return starts.sum(axis=0)
+
+
+def period_rates(taken, missed, starts):
+    # Adherence over all medicines for each period beginning at a row in starts
+    if not len(starts):
+        return np.zeros(0)
+    return _rate(
+        np.add.reduceat(taken.sum(axis=1), starts),
+        np.add.reduceat(missed.sum(axis=1), starts)
+    )
+
+
+def compute(day_items):
+    first_day, medicines, taken, missed = history_arrays(day_items)
+    if first_day is None:
+        return None
+
+    days = first_day + np.arange(len(taken))
+    per_medicine = _rate(taken.sum(axis=0), missed.sum(axis=0))
+
+    # Weeks start on Monday; datetime64 day 0 (1970-01-01) was a Thursday
+    weekday = (days.astype(np.int64) + 3) % 7
+    week_starts = np.flatnonzero(weekday == 0)
+    if not len(week_starts) or week_starts[0] != 0:
+        week_starts = np.concatenate(([0], week_starts))
+    month = days.astype("datetime64[M]")
+    month_starts = np.flatnonzero(np.concatenate(([True], month[1:] != month[:-1])))
+
+    missed_by_weekday = np.bincount(weekday, weights=missed.sum(axis=1), minlength=7)
+
+    return {
+        "medicines": medicines,
+        "overall": float(_rate(taken.sum(), missed.sum())),
+        "adherence": per_medicine,
+        "streaks": longest_streaks(taken, missed),
+        "clusters": missed_clusters(missed),
+        "weekly": [
+            (str(days[i]), rate)
+            for i, rate in zip(week_starts[-TREND_WEEKS:], period_rates(taken, missed, week_starts)[-TREND_WEEKS:])
+        ],
+        "monthly": [
+            (str(month[i]), rate)
+            for i, rate in zip(month_starts[-TREND_MONTHS:], period_rates(taken, missed, month_starts)[-TREND_MONTHS:])
+        ],
+        "missed_by_weekday": missed_by_weekday,
+    }
+
+
+def day_snapshot(tracker):
+    # (date, {dose: status}) copies for compute() on an I/O thread; each dict
+    # is copied in a single call, so a mark made meanwhile on the main thread
+    # cannot break the iteration
+    for month in tracker.months():
+        for date, doses in list(tracker.partition(month).days.items()):
+            yield date, dict(doses)
+
+
+class AdherenceAnalytics:
+    # Caches the computed stats until the store reports a new mark
+    def __init__(self, store):
+        self.store = store
+        self.result = None
+        self.stale = True
+        store.bind(self.on_store_changed)
+
+    def on_store_changed(self, event, **details):
+        if event in ("status", "import", "profile"):
+            self.stale = True
+
+    def stats(self):
+        if self.stale:
+            self.result = compute(self.store.tracker().day_items())
+            self.stale = False
+        return self.result
+
+    def load(self, on_done):
+        # on_done(stats) on the main thread; stale stats are recomputed on an
+        # I/O thread, which also reads any month files not yet in memory
+        if not self.stale or self.store.io is None or not getattr(self.store.backend, "threaded_loads", False):
+            on_done(self.stats())
+            return
+        self.stale = False
+        tracker = self.store.tracker()
+
+        def finish(result):
+            self.result = result
+            on_done(result)
+
+        def failed(error):
+            print("⚠️ Could not compute adherence stats:", error)
+            self.stale = True
+
+        self.store.io.load(lambda: compute(day_snapshot(tracker)), on_done=finish, on_error=failed)
@@ -0,0 +1,214 @@
+import argparse
+import gc
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from dashboard_stats import DashboardStats
+from scheduler import ReminderScheduler
+from store import ReminderStore, atomic_write_json
+from timeutil import MINUTES_PER_DAY, epoch_minutes, format_time
+
+# Headless timings of the data layer on synthetic data, no window needed:
+#   python benchmark.py --sizes 1000 10000 100000 --out bench_results.json
+DEFAULT_SIZES = [1000, 10000, 100000]
+MEDICINES = ["Paracetamol", "Ibuprofen", "Amoxicillin", "Cetirizine", "Metformin",
+             "Losartan", "Omeprazole", "Vitamin C", "Zinc", "Aspirin"]
+# Share of generated reminders that carry a repeat rule
+RECURRING_SHARE = 0.05
+# Days of history the tracker dataset covers, and the span reminders are spread over
+HISTORY_DAYS = 365
+
+
+class NoTimer:
+    # Stand-in for Clock.schedule_once so schedulers run without Kivy
+    def cancel(self):
+        pass
+
+
+def no_schedule(callback, delay):
+    return NoTimer()
+
+
+# === Synthetic data ===
+def make_reminders(count, today, rng):
+    reminders = []
+    for i in range(count):
+        day = today + timedelta(days=rng.randint(-HISTORY_DAYS, HISTORY_DAYS))
+        reminder = {
+            "medicine": f"{rng.choice(MEDICINES)} {i % 97}",
+            "date": day.strftime("%Y-%m-%d"),
+            "time": format_time(rng.randrange(0, MINUTES_PER_DAY, 5)),
+        }
+        if rng.random() < RECURRING_SHARE:
+            reminder["date"] = (today - timedelta(days=rng.randint(0, 30))).strftime("%Y-%m-%d")
+            reminder["repeat"] = rng.choice([
+                {"type": "daily", "interval": 1},
+                {"type": "hourly", "interval": rng.choice([6, 8, 12])},
+                {"type": "weekly", "weekdays": sorted(rng.sample(range(7), 3))},
+            ])
+        reminders.append(reminder)
+    return reminders
+
+
+def make_tracker(count, today, rng):
+    # Flat "{medicine}_{date}" entries like tracker.json from older versions
+    tracker = {}
+    per_day = max(count // HISTORY_DAYS, 1)
+    for i in range(count):
+        day = today - timedelta(days=1 + i // per_day)
+        tracker[f"{MEDICINES[i % per_day % len(MEDICINES)]} {i % per_day}_{day:%Y-%m-%d}"] = (
+            "taken" if rng.random() < 0.85 else "missed"
+        )
+    return tracker
+
+
+def write_dataset(data_dir, size, seed=0):
+    rng = random.Random(seed)
+    today = datetime.now().date()
+    os.makedirs(data_dir, exist_ok=True)
+    atomic_write_json(os.path.join(data_dir, "reminders.json"), make_reminders(size, today, rng))
+    atomic_write_json(os.path.join(data_dir, "tracker.json"), make_tracker(size, today, rng))
+
+
+# === Measurement ===
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return None
+    k = min(int(round(p / 100 * (len(sorted_values) - 1))), len(sorted_values) - 1)
+    return sorted_values[k]
+
+
+def measure(func, repeat):
+    # Latencies in ms plus the peak traced allocation during the runs
+    gc.collect()
+    tracemalloc.start()
+    latencies = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        func(i)
+        latencies.append((time.perf_counter() - start) * 1000)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    latencies.sort()
+    total = sum(latencies)
+    return {
+        "runs": repeat,
+        "ops_per_sec": round(repeat / (total / 1000), 1) if total else None,
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p95_ms": round(percentile(latencies, 95), 3),
+        "p99_ms": round(percentile(latencies, 99), 3),
+        "max_ms": round(latencies[-1], 3),
+        "peak_kb": round(peak / 1024, 1),
+    }
+
+
+def bench_size(size, backend, repeat):
+    data_dir = tempfile.mkdtemp(prefix="medrem-bench-")
+    try:
+        write_dataset(data_dir, size)
+        results = {}
+        now = datetime.now()
+        today = now.date()
+        today_str = today.strftime("%Y-%m-%d")
+
+        # Cold open includes parsing, timestamp backfill and tracker migration
+        start = time.perf_counter()
+        store = ReminderStore(data_dir, backend=backend)
+        results["open_store"] = {"ms": round((time.perf_counter() - start) * 1000, 3)}
+
+        # Home tab: what update_dashboard reads, recomputed from the store
+        def dashboard_recompute(i):
+            store.occurrences_on(today)
+            store.next_reminder(now)
+        results["dashboard_recompute"] = measure(dashboard_recompute, repeat)
+
+        stats = DashboardStats(store)
+        stats.start()
+
+        def dashboard_read(i):
+            stats.active_count(now)
+            stats.next_reminder(now)
+        results["dashboard_read"] = measure(dashboard_read, repeat)
+
+        # Reminder checks: the scheduler rebuild replaces the old minute poll
+        scheduler = ReminderScheduler(store, no_schedule)
+        results["scheduler_rebuild"] = measure(lambda i: scheduler.rebuild(), repeat)
+        results["scheduler_check"] = measure(lambda i: scheduler.check(), repeat)
+
+        # Tracker tab: today's doses, their statuses and the day's counters
+        now_minutes = epoch_minutes(now)
+        day_start = now_minutes - now_minutes % MINUTES_PER_DAY
+
+        def tracker_load(i):
+            for occ in store.occurrences(day_start, day_start + MINUTES_PER_DAY):
+                store.get_status(*occ.tracker_key)
+            store.day_counts(today_str)
+        results["tracker_load"] = measure(tracker_load, repeat)
+        results["tracker_counts"] = measure(lambda i: store.day_counts(today_str), repeat)
+
+        # Persistence; tracker marks are batched, so flush to time the write
+        def add(i):
+            store.add_reminder({"medicine": f"Bench {i}", "date": today_str, "time": "11:59 PM"})
+        results["add_reminder"] = measure(add, repeat)
+
+        def edit(i):
+            index = len(store.reminders()) - 1 - i
+            reminder = dict(store.get_reminder(index))
+            reminder["time"] = "11:58 PM"
+            store.update_reminder(index, reminder)
+        results["edit_reminder"] = measure(edit, repeat)
+
+        results["delete_reminder"] = measure(lambda i: store.delete_reminder(len(store.reminders()) - 1), repeat)
+
+        def mark(i):
+            store.set_status(today_str, f"Bench {i}", "taken")
+            store.flush()
+        results["mark_and_flush"] = measure(mark, repeat)
+
+        stats.stop()
+        store.close()
+        return results
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time the reminder data layer on synthetic datasets")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="entries per dataset (1000 .. 1000000)")
+    parser.add_argument("--backend", choices=("json", "sqlite"), default="json")
+    parser.add_argument("--repeat", type=int, default=20, help="runs per operation")
+    parser.add_argument("--out", default="bench_results.json", help="JSON results file")
+    args = parser.parse_args(argv)
+
+    report = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "backend": args.backend,
+        "repeat": args.repeat,
+        "sizes": {},
+    }
+    for size in args.sizes:
+        print(f"{size} entries ...", flush=True)
+        report["sizes"][str(size)] = results = bench_size(size, args.backend, args.repeat)
+        for name, result in results.items():
+            if "p50_ms" in result:
+                print(f"  {name:22} p50 {result['p50_ms']:>10} ms  p95 {result['p95_ms']:>10} ms  peak {result['peak_kb']:>10} KB")
+            else:
+                print(f"  {name:22} {result['ms']:>14} ms")
+
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=4)
+    print(f"Results written to {args.out}")
+    return report
+
+
+if __name__ == "__main__":
+    main()
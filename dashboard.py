@@ -1,8 +1,4 @@
-import json
-import os
 from datetime import datetime
-from kivy.clock import Clock
-from plyer import notification
 
 from kivymd.uix.screen import MDScreen
 from kivymd.uix.label import MDLabel
@@ -12,11 +8,11 @@ from kivymd.uix.card import MDCard
 from kivymd.uix.scrollview import MDScrollView
 from kivymd.uix.gridlayout import MDGridLayout
 from kivymd.uix.dialog import MDDialog
+from kivymd.uix.list import OneLineIconListItem, IconLeftWidget
+from kivymd.uix.textfield import MDTextField
 from kivymd.uix.fitimage import FitImage
 from kivymd.app import MDApp
-
-REMINDERS_FILE = os.path.join("data", "reminders.json")
-TRACK_FILE = os.path.join("data", "tracker.json")
+from alerts import group_by_time
 
 def rgb(r, g, b, a=255):
     return (r / 255, g / 255, b / 255, a / 255)
@@ -25,9 +21,6 @@ class DashboardScreen(MDScreen):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
 
-        self.notification_count = 0
-        self.pending_notifications = []
-
         self.layout = MDBoxLayout(orientation="vertical")
 
         # === HEADER ===
@@ -40,7 +33,7 @@ class DashboardScreen(MDScreen):
 
         title_layout = MDBoxLayout(orientation="horizontal", spacing=10)
         logo = FitImage(source="assets/headerlogo.png", size_hint=(None, None), size=(100, 100))
-        title_label = MDLabel(
+        self.title_label = title_label = MDLabel(
             text="Smart Medicine Reminder",
             halign="left",
             valign="middle",
@@ -59,7 +52,17 @@ class DashboardScreen(MDScreen):
             on_press=self.on_notif_pressed
         )
 
+        # Patient switcher, for caregivers managing several people
+        self.profile_btn = MDIconButton(
+            icon="account-switch",
+            theme_icon_color="Custom",
+            icon_color=(1, 1, 1, 1),
+            pos_hint={"center_y": 0.5},
+            on_press=self.on_profile_pressed
+        )
+
         self.header.add_widget(title_layout)
+        self.header.add_widget(self.profile_btn)
         self.header.add_widget(self.notif_btn)
         self.layout.add_widget(self.header)
 
@@ -79,11 +82,18 @@ class DashboardScreen(MDScreen):
         self.next_card = self.create_card("⏰ Next Reminder", "None")
         self.inner_layout.add_widget(self.next_card)
 
+        self.guide_card = self.create_card("📖 Medicine Guide", "Search medicines by type or use", on_press=self.go_to_guide)
+        self.inner_layout.add_widget(self.guide_card)
+
         self.scroll.add_widget(self.inner_layout)
         self.layout.add_widget(self.scroll)
         self.add_widget(self.layout)
 
-        Clock.schedule_interval(self.check_reminder_times, 60)
+        MDApp.get_running_app().dashboard_stats.bind(self.on_stats_changed)
+        MDApp.get_running_app().alerts.bind(lambda event, **details: self.update_notif_icon())
+        MDApp.get_running_app().profiles.bind(self.on_profiles_changed)
+        self.update_notif_icon()
+        self.update_title()
 
     def on_pre_enter(self, *args):
         # Update header color based on current theme
@@ -115,52 +125,16 @@ class DashboardScreen(MDScreen):
         return card
 
     def update_dashboard(self):
+        # Figures are maintained by the app's DashboardStats; this only reads them
         now = datetime.now()
-        active_count = 0
-        today_meds = []
-        next_reminder = None
+        stats = MDApp.get_running_app().dashboard_stats
+        active_count = stats.active_count(now)
+        today_meds = stats.today_meds
 
-        tracker_data = {}
-        if os.path.exists(TRACK_FILE):
-            with open(TRACK_FILE, "r") as f:
-                try:
-                    tracker_data = json.load(f)
-                except:
-                    tracker_data = {}
-
-        reminders = []
-        if os.path.exists(REMINDERS_FILE):
-            with open(REMINDERS_FILE, "r") as f:
-                try:
-                    reminders = json.load(f)
-                except:
-                    reminders = []
-
-        for r in reminders:
-            med = r.get("medicine")
-            time_str = r.get("time")
-            date_str = r.get("date")
-            key = f"{med}_{date_str}"
-
-            try:
-                reminder_time = datetime.strptime(f"{date_str} {time_str}", "%Y-%m-%d %I:%M %p")
-            except:
-                continue
-
-            if date_str == now.strftime("%Y-%m-%d"):
-                today_meds.append(f"{med} at {time_str}")
-
-                if key in tracker_data:
-                    status = tracker_data[key]
-                    if status == "missed" and reminder_time < now:
-                        active_count += 1
-                else:
-                    if reminder_time < now:
-                        active_count += 1
-
-            if reminder_time > now:
-                if not next_reminder or reminder_time < next_reminder["time"]:
-                    next_reminder = {"medicine": med, "time": reminder_time}
+        next_reminder = None
+        upcoming = stats.next_reminder(now)
+        if upcoming:
+            next_reminder = {"medicine": upcoming[0].get("medicine"), "time": upcoming[1]}
 
         self.active_card.children[0].text = f"Active\nReminders\n{active_count}" if active_count else "Active\nReminders\nNone"
         self.today_card.children[0].text = f"Today’s\nMedicines\n{len(today_meds)}" if today_meds else "Today’s\nMedicines\n0"
@@ -172,38 +146,78 @@ class DashboardScreen(MDScreen):
 
         self.today_meds_list = today_meds
 
-    def check_reminder_times(self, dt):
-        now = datetime.now().replace(second=0, microsecond=0)
-
-        if os.path.exists(REMINDERS_FILE):
-            with open(REMINDERS_FILE, "r") as f:
-                try:
-                    reminders = json.load(f)
-                except:
-                    reminders = []
-
-            for r in reminders:
-                med = r.get("medicine")
-                time_str = r.get("time")
-                date_str = r.get("date")
-                key = f"{med}_{date_str}_{time_str}"
-
-                if date_str == now.strftime("%Y-%m-%d"):
-                    try:
-                        reminder_time = datetime.strptime(f"{date_str} {time_str}", "%Y-%m-%d %I:%M %p")
-                        if reminder_time == now and key not in self.pending_notifications:
-                            self.pending_notifications.append(key)
-                            self.notification_count += 1
-                            self.update_notif_icon()
-                            self.play_notification_sound()
-                    except:
-                        continue
+    def on_stats_changed(self, event, **details):
+        if self.manager and self.manager.current == self.name:
+            self.update_dashboard()
+
+    def on_profiles_changed(self, event, **details):
+        if event in ("profile", "profiles"):
+            self.update_title()
+
+    def update_title(self):
+        profiles = MDApp.get_running_app().profiles
+        title = "Smart Medicine Reminder"
+        if len(profiles.profiles()) > 1:
+            title += f"\n{profiles.name(profiles.active)}"
+        self.title_label.text = title
+
+    # === Patient Profiles ===
+    def on_profile_pressed(self, instance):
+        profiles = MDApp.get_running_app().profiles
+        items = []
+        for profile in profiles.profiles():
+            item = OneLineIconListItem(
+                text=profile["name"],
+                on_release=lambda x, profile_id=profile["id"]: self.switch_profile(profile_id)
+            )
+            icon = "check" if profile["id"] == profiles.active else "account"
+            item.add_widget(IconLeftWidget(icon=icon))
+            items.append(item)
+
+        self.dialog = MDDialog(
+            title="Patients",
+            type="simple",
+            items=items,
+            buttons=[MDFlatButton(text="ADD PATIENT", on_release=lambda x: self.open_add_profile())]
+        )
+        self.dialog.open()
+
+    def switch_profile(self, profile_id):
+        if self.dialog:
+            self.dialog.dismiss()
+        MDApp.get_running_app().profiles.switch(profile_id)
+
+    def open_add_profile(self):
+        if self.dialog:
+            self.dialog.dismiss()
+        self.profile_name_input = MDTextField(hint_text="Patient name", mode="rectangle")
+        self.dialog = MDDialog(
+            title="Add Patient",
+            type="custom",
+            content_cls=self.profile_name_input,
+            buttons=[
+                MDFlatButton(text="CANCEL", on_release=lambda x: self.dialog.dismiss()),
+                MDFlatButton(text="ADD", on_release=lambda x: self.add_profile())
+            ]
+        )
+        self.dialog.open()
+
+    def add_profile(self):
+        name = self.profile_name_input.text.strip()
+        if not name:
+            return
+        self.dialog.dismiss()
+        profiles = MDApp.get_running_app().profiles
+        profiles.switch(profiles.add(name))
+        print("👤 Patient added:", name)
 
     def update_notif_icon(self):
-        self.notif_btn.icon = "bell-ring" if self.notification_count > 0 else "bell-outline"
+        pending = MDApp.get_running_app().alerts.pending
+        self.notif_btn.icon = "bell-ring" if pending else "bell-outline"
 
     def on_notif_pressed(self, instance):
-        if not self.pending_notifications:
+        pending = MDApp.get_running_app().alerts.pending
+        if not pending:
             self.dialog = MDDialog(
                 title="Notifications",
                 text="No new medicine reminders.",
@@ -212,10 +226,10 @@ class DashboardScreen(MDScreen):
             self.dialog.open()
             return
 
+        # One line per time slot rather than one per dose
         messages = []
-        for key in self.pending_notifications:
-            med_name = key.split("_")[0]
-            messages.append(f"Please take your {med_name} medicine")
+        for time_str, medicines in group_by_time(pending):
+            messages.append(f"{time_str}: please take {', '.join(medicines)}")
 
         self.dialog = MDDialog(
             title="Medicine Reminder",
@@ -225,19 +239,10 @@ class DashboardScreen(MDScreen):
         self.dialog.open()
 
     def clear_notifications(self):
-        self.pending_notifications.clear()
-        self.notification_count = 0
-        self.update_notif_icon()
+        MDApp.get_running_app().alerts.clear_pending()
         if self.dialog:
             self.dialog.dismiss()
 
-    def play_notification_sound(self):
-        notification.notify(
-            title="Medicine Reminder",
-            message="You have a medicine to take!",
-            timeout=5
-        )
-
     def show_today_meds(self):
         if not self.today_meds_list:
             text = "All medicines taken or no reminders today."
@@ -254,21 +259,19 @@ class DashboardScreen(MDScreen):
 
     # === Navigation Methods ===
     def go_to_home(self, *args):
-        if self.manager:
-            self.manager.current = "dashboard"
+        MDApp.get_running_app().root.switch("dashboard")
 
     def go_to_add(self, *args):
-        if self.manager:
-            self.manager.current = "add_reminder"
+        MDApp.get_running_app().root.switch("add_reminder")
 
     def go_to_view(self, *args):
-        if self.manager:
-            self.manager.current = "view_reminders"
+        MDApp.get_running_app().root.switch("view_reminders")
 
     def go_to_tracker(self, *args):
-        if self.manager:
-            self.manager.current = "tracker"
+        MDApp.get_running_app().root.switch("tracker")
 
     def go_to_settings(self, *args):
-        if self.manager:
-            self.manager.current = "settings"
+        MDApp.get_running_app().root.switch("settings")
+
+    def go_to_guide(self, *args):
+        MDApp.get_running_app().root.switch("guide")
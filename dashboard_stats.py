@@ -0,0 +1,123 @@
+from bisect import bisect_right
+from datetime import datetime, timedelta
+
+from events import EventSource, Timer
+from recurrence import Occurrence, next_occurrence, occurrences
+from timeutil import MINUTES_PER_DAY, epoch_minutes, from_epoch_minutes
+
+
+class DashboardStats(EventSource):
+    # Home tab figures (today's doses, active count, next reminder) kept up to
+    # date from store events and a timer at midnight, so showing the
+    # dashboard only reads these values instead of rescanning every reminder.
+    # Listeners get callback(event, **details) with event "changed" or "rollover".
+    def __init__(self, store, schedule=None):
+        super().__init__()
+        self.store = store
+        self.timer = Timer(schedule) if schedule else None
+        self.day = None
+        self.doses = []
+        self.times = []
+        self.statuses = {}
+        self.today_meds = []
+        self._next = None
+        self._next_valid = False
+
+    def start(self):
+        self.store.bind(self.on_store_changed)
+        self.reset_day()
+        self.dispatch("changed")
+
+    def stop(self):
+        self.store.unbind(self.on_store_changed)
+        if self.timer is not None:
+            self.timer.cancel()
+
+    # === Maintenance ===
+    def reset_day(self):
+        now = datetime.now()
+        self.day = now.date()
+        self.doses = self.store.occurrences_on(self.day)
+        self.times = [occ.at for occ in self.doses]
+        self.statuses = dict(self.store.tracker().day(self.day.strftime("%Y-%m-%d")))
+        self.today_meds = [f"{occ.medicine} at {occ.time_str}" for occ in self.doses]
+        self._next_valid = False
+        self.arm(now)
+
+    def on_store_changed(self, event, **details):
+        if event == "add":
+            self.add_doses(details["reminder"])
+        elif event == "edit" and details.get("previous") is not None:
+            self.remove_doses(details["previous"])
+            self.add_doses(details["reminder"])
+        elif event == "delete":
+            self.remove_doses(details["reminder"])
+        elif event in ("edit", "import", "profile"):
+            # Bulk changes: re-read today from the store
+            self.reset_day()
+        elif event == "status":
+            if details["date"] != self.day.strftime("%Y-%m-%d"):
+                return
+            self.statuses[details["dose"]] = details["status"]
+        else:
+            return
+        self.dispatch("changed")
+
+    def add_doses(self, reminder):
+        start = epoch_minutes(datetime.combine(self.day, datetime.min.time()))
+        for at in occurrences(reminder, start, start + MINUTES_PER_DAY):
+            i = bisect_right(self.times, at)
+            occ = Occurrence(reminder, at)
+            self.times.insert(i, at)
+            self.doses.insert(i, occ)
+            self.today_meds.insert(i, f"{occ.medicine} at {occ.time_str}")
+
+        if self._next_valid:
+            at = next_occurrence(reminder, epoch_minutes(datetime.now()))
+            if at is not None and (self._next is None or from_epoch_minutes(at) < self._next[1]):
+                self._next = (reminder, from_epoch_minutes(at))
+
+    def remove_doses(self, reminder):
+        # Today's doses of the reminder dict that was replaced or deleted
+        for i in reversed(range(len(self.doses))):
+            if self.doses[i].reminder is reminder:
+                del self.times[i]
+                del self.doses[i]
+                del self.today_meds[i]
+        if self._next is not None and self._next[0] is reminder:
+            self._next_valid = False
+
+    # === Reads ===
+    def active_count(self, now):
+        # Doses due by now that are not marked taken
+        due = bisect_right(self.times, epoch_minutes(now))
+        return sum(1 for occ in self.doses[:due] if self.statuses.get(occ.dose) != "taken")
+
+    def next_reminder(self, now):
+        # (reminder, datetime), recomputed only after the cached one has passed
+        if self.day is None:
+            return None
+        if not self._next_valid or (self._next is not None and self._next[1] <= now):
+            self._next = self.store.next_reminder(now)
+            self._next_valid = True
+        return self._next
+
+    # === Day rollover ===
+    def arm(self, now):
+        if self.timer is None:
+            return
+        midnight = datetime.combine(self.day + timedelta(days=1), datetime.min.time())
+        self.timer.start(self.on_rollover, (midnight - now).total_seconds())
+
+    def on_rollover(self, *args):
+        if datetime.now().date() == self.day:
+            # Timer ran a little early; wait for midnight proper
+            self.arm(datetime.now())
+            return
+        self.reset_day()
+        self.dispatch("rollover", day=self.day)
+
+    def wake(self):
+        # App resumed: midnight may have passed while the timer was suspended
+        if self.day is not None and datetime.now().date() != self.day:
+            self.on_rollover()
@@ -1,5 +1,3 @@
-import json
-import os
 from kivy.app import App
 from datetime import datetime
 from kivymd.uix.screen import MDScreen
@@ -11,8 +9,6 @@ from kivymd.uix.card import MDCard
 from kivymd.uix.dialog import MDDialog
 from kivy.uix.anchorlayout import AnchorLayout
 
-DATA_FILE = os.path.join("data", "reminders.json")
-
 class EditReminderScreen(MDScreen):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
@@ -57,17 +53,11 @@ class EditReminderScreen(MDScreen):
         if self.reminder_index is None:
             return
 
-        if os.path.exists(DATA_FILE):
-            with open(DATA_FILE, "r") as f:
-                try:
-                    reminders = json.load(f)
-                    if 0 <= self.reminder_index < len(reminders):
-                        self.reminder_data = reminders[self.reminder_index]
-                        self.medicine_input.text = self.reminder_data.get("medicine", "")
-                        self.time_input.text = self.reminder_data.get("time", "")
-                        self.date_input.text = self.reminder_data.get("date", "")
-                except:
-                    pass
+        self.reminder_data = App.get_running_app().store.get_reminder(self.reminder_index)
+        if self.reminder_data:
+            self.medicine_input.text = self.reminder_data.get("medicine", "")
+            self.time_input.text = self.reminder_data.get("time", "")
+            self.date_input.text = self.reminder_data.get("date", "")
 
     def save_edit(self, instance):
         new_medicine = self.medicine_input.text.strip()
@@ -76,15 +66,9 @@ class EditReminderScreen(MDScreen):
             return
 
         if self.reminder_data and self.reminder_index is not None:
-            self.reminder_data["medicine"] = new_medicine
-
-            with open(DATA_FILE, "r") as f:
-                reminders = json.load(f)
-
-            reminders[self.reminder_index] = self.reminder_data
-
-            with open(DATA_FILE, "w") as f:
-                json.dump(reminders, f, indent=4)
+            # A copy, so listeners can still see the name it replaces
+            self.reminder_data = dict(self.reminder_data, medicine=new_medicine)
+            App.get_running_app().store.update_reminder(self.reminder_index, self.reminder_data)
 
             self.show_dialog("✅ Input Edited Successfully")
 
@@ -0,0 +1,46 @@
+# Small building blocks shared by the store and the services around it
+
+
+class EventSource:
+    # bind/unbind/dispatch for listeners called as callback(event, **details)
+    def __init__(self):
+        self.listeners = []
+
+    def bind(self, callback):
+        self.listeners.append(callback)
+
+    def unbind(self, callback):
+        if callback in self.listeners:
+            self.listeners.remove(callback)
+
+    def dispatch(self, event, **details):
+        for callback in list(self.listeners):
+            callback(event, **details)
+
+
+class Timer:
+    # At most one pending call at a time through
+    # schedule(callback, delay) -> event with cancel(), e.g. Clock.schedule_once
+    def __init__(self, schedule):
+        self.schedule = schedule
+        self.callback = None
+        self.event = None
+
+    def start(self, callback, delay):
+        # Replaces any call still pending
+        self.cancel()
+        self.callback = callback
+        self.event = self.schedule(self._fire, max(delay, 0))
+
+    def _fire(self, *args):
+        self.event = None
+        self.callback(*args)
+
+    def cancel(self):
+        if self.event is not None:
+            self.event.cancel()
+            self.event = None
+
+    @property
+    def pending(self):
+        return self.event is not None
@@ -0,0 +1,169 @@
+from kivymd.uix.screen import MDScreen
+from kivymd.uix.boxlayout import MDBoxLayout
+from kivymd.uix.button import MDRaisedButton, MDFlatButton
+from kivymd.uix.label import MDLabel
+from kivymd.uix.card import MDCard
+from kivymd.uix.dialog import MDDialog
+from kivymd.uix.textfield import MDTextField
+from kivy.uix.anchorlayout import AnchorLayout
+from kivy.uix.behaviors import ButtonBehavior
+from kivy.uix.recycleview import RecycleView
+from kivy.uix.recycleview.views import RecycleDataViewBehavior
+from kivy.uix.recycleboxlayout import RecycleBoxLayout
+from kivy.clock import Clock
+from kivy.app import App
+
+ROW_HEIGHT = 72
+# Entries decoded and handed to the list at a time
+PAGE_SIZE = 50
+# Seconds of typing pause before searching
+SEARCH_DELAY = 0.2
+
+
+class GuideRow(RecycleDataViewBehavior, ButtonBehavior, MDBoxLayout):
+    # One recycled guide entry: type and examples, tap for the description
+    def __init__(self, **kwargs):
+        super().__init__(orientation="vertical", padding=[10, 5], **kwargs)
+        self.screen = None
+        self.entry_id = None
+        self.type_label = MDLabel(theme_text_color="Primary", font_style="Subtitle1")
+        self.examples_label = MDLabel(theme_text_color="Hint", font_style="Caption")
+        self.add_widget(self.type_label)
+        self.add_widget(self.examples_label)
+
+    def refresh_view_attrs(self, rv, index, data):
+        self.screen = data["screen"]
+        self.entry_id = data["entry_id"]
+        self.type_label.text = data["type"]
+        self.examples_label.text = data["examples"]
+        return super().refresh_view_attrs(rv, index, data)
+
+    def on_release(self):
+        self.screen.show_entry(self.entry_id)
+
+
+class GuideScreen(MDScreen):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.entry_dialog = None
+        # Ids matching the search (a view into the index, or a list) and how
+        # many of them are in the list so far
+        self.results = []
+        self.shown = 0
+        self.search_trigger = Clock.create_trigger(lambda dt: self.run_search(), SEARCH_DELAY)
+        self.build_ui()
+
+    def on_pre_enter(self, *args):
+        # The index is opened (and built if the guide changed) on an I/O thread at startup
+        App.get_running_app().when_guide_ready(self.run_search)
+
+    def build_ui(self):
+        anchor_layout = AnchorLayout(anchor_x="center", anchor_y="center", size_hint=(1, 1))
+
+        main_card = MDCard(
+            padding=20,
+            orientation="vertical",
+            radius=[15],
+            size_hint=(0.9, None),
+            height=560,
+            spacing=15,
+            elevation=5
+        )
+
+        main_card.add_widget(MDLabel(
+            text="Medicine Guide",
+            halign="center",
+            font_style="H5",
+            theme_text_color="Primary",
+            size_hint_y=None,
+            height=40
+        ))
+
+        self.search_input = MDTextField(hint_text="Search type, use or medicine", mode="rectangle")
+        self.search_input.bind(text=lambda instance, text: self.search_trigger())
+        main_card.add_widget(self.search_input)
+
+        self.count_label = MDLabel(
+            text="Loading the guide...",
+            halign="center",
+            theme_text_color="Hint",
+            size_hint_y=None,
+            height=30
+        )
+        main_card.add_widget(self.count_label)
+
+        self.rv = RecycleView(size_hint=(1, 1), viewclass=GuideRow)
+        list_layout = RecycleBoxLayout(
+            orientation="vertical",
+            size_hint_y=None,
+            default_size=(None, ROW_HEIGHT),
+            default_size_hint=(1, None)
+        )
+        list_layout.bind(minimum_height=list_layout.setter("height"))
+        self.rv.add_widget(list_layout)
+        self.rv.bind(scroll_y=self.on_scroll)
+        main_card.add_widget(self.rv)
+
+        back_btn = MDRaisedButton(
+            text="Back",
+            size_hint=(1, None),
+            height=50,
+            on_release=self.go_back
+        )
+        main_card.add_widget(back_btn)
+
+        anchor_layout.add_widget(main_card)
+        self.add_widget(anchor_layout)
+
+    # === Search and paging ===
+    def run_search(self):
+        app = App.get_running_app()
+        if app.guide is None:
+            if app.guide_error is not None:
+                self.count_label.text = "The medicine guide could not be opened"
+            return
+        self.results, truncated = app.guide.search(self.search_input.text)
+        self.shown = 0
+        self.rv.data = []
+        self.rv.scroll_y = 1
+        self.load_page()
+        count = len(self.results)
+        if truncated:
+            self.count_label.text = f"{count}+ entries, keep typing to narrow down"
+        else:
+            self.count_label.text = f"{count} entr{'y' if count == 1 else 'ies'}"
+
+    def load_page(self):
+        # Decodes the next page only; the rest of the results stay ids
+        guide = App.get_running_app().guide
+        page = self.results[self.shown:self.shown + PAGE_SIZE]
+        rows = []
+        for entry_id in page:
+            entry = guide.entry(entry_id)
+            rows.append({
+                "screen": self,
+                "entry_id": entry_id,
+                "type": entry["type"],
+                "examples": entry["examples"],
+            })
+        self.shown += len(rows)
+        self.rv.data.extend(rows)
+
+    def on_scroll(self, instance, scroll_y):
+        # Near the bottom: append the next page
+        if scroll_y < 0.1 and self.shown < len(self.results):
+            self.load_page()
+
+    def show_entry(self, entry_id):
+        entry = App.get_running_app().guide.entry(entry_id)
+        if self.entry_dialog:
+            self.entry_dialog.dismiss()
+        self.entry_dialog = MDDialog(
+            title=entry["type"],
+            text=f"{entry['description']}\n\nExamples: {entry['examples']}",
+            buttons=[MDFlatButton(text="OK", on_release=lambda x: self.entry_dialog.dismiss())]
+        )
+        self.entry_dialog.open()
+
+    def go_back(self, instance=None):
+        App.get_running_app().root.go_back()
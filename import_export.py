@@ -0,0 +1,311 @@
+import csv
+import math
+import os
+from datetime import datetime, timezone
+
+from recurrence import WEEKDAYS, make_reminder, rule_text
+from timeutil import MINUTES_PER_DAY, date_string, parse_date, reminder_minutes
+from tracker_index import STATUSES
+
+# Bulk import/export of reminders (CSV, iCalendar) and tracker history (CSV).
+# Files are read line by line and written row by row, so only the rows
+# themselves are held in memory, never the file text.
+
+# Rows handled between progress reports
+BATCH_SIZE = 1000
+# Row errors listed in the import summary; the rest are only counted
+MAX_ERRORS = 20
+
+REMINDER_FIELDS = ["medicine", "time", "date", "repeat", "course_days"]
+HISTORY_FIELDS = ["date", "dose", "status"]
+ICS_DAYS = ["MO", "TU", "WE", "TH", "FR", "SA", "SU"]
+
+
+class ImportResult:
+    def __init__(self, kind):
+        # kind: "reminders" or "history"
+        self.kind = kind
+        self.items = []
+        self.errors = []
+        self.error_count = 0
+
+    def fail(self, row, message):
+        self.error_count += 1
+        if len(self.errors) < MAX_ERRORS:
+            self.errors.append(f"Row {row}: {message}")
+
+    def summary(self):
+        text = f"{len(self.items)} {'reminders' if self.kind == 'reminders' else 'history entries'} imported"
+        if self.error_count:
+            text += f", {self.error_count} rows skipped\n" + "\n".join(self.errors)
+            if self.error_count > len(self.errors):
+                text += f"\n... and {self.error_count - len(self.errors)} more"
+        return text
+
+
+def read_lines(path, progress=None):
+    # Yields the file's lines; progress(fraction) every BATCH_SIZE lines
+    total = os.path.getsize(path) or 1
+    done = 0
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        for i, line in enumerate(f, 1):
+            done += len(line)
+            if progress and i % BATCH_SIZE == 0:
+                progress(min(done / total, 1.0))
+            yield line
+    if progress:
+        progress(1.0)
+
+
+def atomic_write_rows(path, write_rows):
+    # write_rows(f) fills a temp file that then replaces path
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", newline="", encoding="utf-8") as f:
+        count = write_rows(f)
+    os.replace(tmp, path)
+    return count
+
+
+# === CSV ===
+def read_reminders_csv(path, progress=None):
+    result = ImportResult("reminders")
+    reader = csv.DictReader(read_lines(path, progress))
+    missing = {"medicine", "time", "date"} - set(reader.fieldnames or [])
+    if missing:
+        raise ValueError(f"Missing CSV columns: {', '.join(sorted(missing))}")
+    for row in reader:
+        try:
+            result.items.append(make_reminder(
+                row["medicine"] or "", row["time"] or "", row["date"] or "",
+                row.get("repeat") or "", row.get("course_days") or ""
+            ))
+        except ValueError as e:
+            result.fail(reader.line_num, e)
+    return result
+
+
+def read_history_csv(path, progress=None):
+    result = ImportResult("history")
+    reader = csv.DictReader(read_lines(path, progress))
+    missing = set(HISTORY_FIELDS) - set(reader.fieldnames or [])
+    if missing:
+        raise ValueError(f"Missing CSV columns: {', '.join(sorted(missing))}")
+    for row in reader:
+        day = parse_date((row["date"] or "").strip())
+        dose = (row["dose"] or "").strip()
+        status = (row["status"] or "").strip().lower()
+        if day is None:
+            result.fail(reader.line_num, "Invalid date format. Use YYYY-MM-DD")
+        elif not dose:
+            result.fail(reader.line_num, "Missing dose")
+        elif status not in STATUSES:
+            result.fail(reader.line_num, f"Status must be one of {', '.join(STATUSES)}")
+        else:
+            result.items.append((date_string(day), dose, status))
+    return result
+
+
+def write_reminders_csv(path, reminders):
+    def write_rows(f):
+        writer = csv.writer(f)
+        writer.writerow(REMINDER_FIELDS)
+        for r in reminders:
+            repeat, course = rule_text(r.get("repeat"))
+            writer.writerow([r.get("medicine", ""), r.get("time", ""), r.get("date", ""), repeat, course])
+        return len(reminders)
+    return atomic_write_rows(path, write_rows)
+
+
+def write_history_csv(path, entries):
+    # entries: (date, dose, status) tuples, e.g. store.tracker().items()
+    def write_rows(f):
+        writer = csv.writer(f)
+        writer.writerow(HISTORY_FIELDS)
+        count = 0
+        for entry in entries:
+            writer.writerow(entry)
+            count += 1
+        return count
+    return atomic_write_rows(path, write_rows)
+
+
+# === iCalendar ===
+def ics_escape(text):
+    return text.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,").replace("\n", "\\n")
+
+
+def ics_unescape(text):
+    return (text.replace("\\n", "\n").replace("\\N", "\n")
+            .replace("\\,", ",").replace("\\;", ";").replace("\\\\", "\\"))
+
+
+def ics_lines(path, progress=None):
+    # (line number, name, params, value) with folded lines joined
+    pending, start = None, 0
+    for number, line in enumerate(read_lines(path, progress), 1):
+        line = line.rstrip("\r\n")
+        if line[:1] in (" ", "\t") and pending is not None:
+            pending += line[1:]
+            continue
+        if pending:
+            yield ics_property(start, pending)
+        pending, start = line, number
+    if pending:
+        yield ics_property(start, pending)
+
+
+def ics_property(number, line):
+    head, _, value = line.partition(":")
+    name, *params = head.split(";")
+    return number, name.upper(), dict(p.partition("=")[::2] for p in params), value
+
+
+def ics_datetime(params, value):
+    # DTSTART/UNTIL -> local naive datetime; all-day values start at 08:00
+    if params.get("VALUE") == "DATE" or len(value) == 8:
+        return datetime.strptime(value[:8], "%Y%m%d").replace(hour=8)
+    if value.endswith("Z"):
+        utc = datetime.strptime(value, "%Y%m%dT%H%M%SZ").replace(tzinfo=timezone.utc)
+        return utc.astimezone().replace(tzinfo=None)
+    return datetime.strptime(value[:15], "%Y%m%dT%H%M%S")
+
+
+def rrule_texts(rrule, start):
+    # RRULE value -> (repeat_text, course_text) for make_reminder
+    parts = dict(p.partition("=")[::2] for p in rrule.upper().split(";") if p)
+    freq = parts.get("FREQ")
+    interval = int(parts.get("INTERVAL") or 1)
+    if freq == "DAILY":
+        repeat, days_per_dose = ("daily" if interval == 1 else f"every {interval} days"), interval
+    elif freq == "HOURLY":
+        repeat, days_per_dose = f"every {interval} hours", interval / 24
+    elif freq == "WEEKLY" and interval == 1:
+        days = [d[-2:] for d in parts.get("BYDAY", ICS_DAYS[start.weekday()]).split(",")]
+        if any(d not in ICS_DAYS for d in days):
+            raise ValueError(f"Unsupported BYDAY in RRULE: {parts['BYDAY']}")
+        repeat = ",".join(WEEKDAYS[ICS_DAYS.index(d)] for d in days)
+        days_per_dose = 7 / len(days)
+    else:
+        raise ValueError(f"Unsupported RRULE: {rrule}")
+
+    course = ""
+    if parts.get("UNTIL"):
+        course = str(max((ics_datetime({}, parts["UNTIL"]).date() - start.date()).days + 1, 1))
+    elif parts.get("COUNT"):
+        course = str(max(math.ceil(int(parts["COUNT"]) * days_per_dose), 1))
+    return repeat, course
+
+
+def read_reminders_ics(path, progress=None):
+    # One reminder per VEVENT: SUMMARY is the medicine, DTSTART the first
+    # dose and an optional RRULE the repeat rule
+    result = ImportResult("reminders")
+    event = None
+    for number, name, params, value in ics_lines(path, progress):
+        if name == "BEGIN" and value.upper() == "VEVENT":
+            event = {"row": number}
+        elif event is None:
+            continue
+        elif name == "END" and value.upper() == "VEVENT":
+            try:
+                if "DTSTART" not in event:
+                    raise ValueError("Missing DTSTART")
+                start = ics_datetime(*event["DTSTART"])
+                repeat, course = rrule_texts(event["RRULE"], start) if "RRULE" in event else ("", "")
+                result.items.append(make_reminder(
+                    event.get("SUMMARY", ""), start.strftime("%I:%M %p"), start.strftime("%Y-%m-%d"), repeat, course
+                ))
+            except ValueError as e:
+                result.fail(event["row"], e)
+            event = None
+        elif name == "SUMMARY":
+            event["SUMMARY"] = ics_unescape(value)
+        elif name == "DTSTART":
+            event["DTSTART"] = (params, value)
+        elif name == "RRULE":
+            event["RRULE"] = value
+    return result
+
+
+def ics_rrule(rule, first):
+    kind = rule.get("type")
+    interval = int(rule.get("interval", 1))
+    if kind == "weekly":
+        days = rule.get("weekdays") or []
+        text = "FREQ=WEEKLY;BYDAY=" + ",".join(ICS_DAYS[d] for d in days) if days else "FREQ=WEEKLY"
+    else:
+        text = f"FREQ={'HOURLY' if kind == 'hourly' else 'DAILY'};INTERVAL={interval}"
+    if rule.get("course_days"):
+        last_day = first // MINUTES_PER_DAY + int(rule["course_days"]) - 1
+        text += f";UNTIL={date_string(last_day).replace('-', '')}T235959"
+    return text
+
+
+def write_reminders_ics(path, reminders):
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+    def write_rows(f):
+        f.write("BEGIN:VCALENDAR\r\nVERSION:2.0\r\nPRODID:-//Smart Medicine Reminder//EN\r\n")
+        count = 0
+        for i, r in enumerate(reminders):
+            first = reminder_minutes(r)
+            if first is None:
+                continue
+            day, minute = divmod(first, MINUTES_PER_DAY)
+            lines = [
+                "BEGIN:VEVENT",
+                f"UID:{i}-{first}@medicine-reminder",
+                f"DTSTAMP:{stamp}",
+                f"DTSTART:{date_string(day).replace('-', '')}T{minute // 60:02d}{minute % 60:02d}00",
+                f"SUMMARY:{ics_escape(r.get('medicine', ''))}",
+            ]
+            if r.get("repeat"):
+                lines.append(f"RRULE:{ics_rrule(r['repeat'], first)}")
+            lines.append("END:VEVENT")
+            f.write("\r\n".join(lines) + "\r\n")
+            count += 1
+        f.write("END:VCALENDAR\r\n")
+        return count
+    return atomic_write_rows(path, write_rows)
+
+
+# === Entry points ===
+def read_file(path, progress=None):
+    # Picks the reader from the extension and, for CSV, the header
+    if path.lower().endswith(".ics"):
+        return read_reminders_ics(path, progress)
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        header = next(csv.reader(f), [])
+    if "status" in header:
+        return read_history_csv(path, progress)
+    return read_reminders_csv(path, progress)
+
+
+def apply_import(store, result):
+    # Main thread: one store write for the whole file
+    if not result.items:
+        return
+    if result.kind == "reminders":
+        store.add_reminders(result.items)
+    else:
+        store.set_statuses(result.items)
+
+
+def export_files(store, export_dir, progress=None):
+    # Snapshots the data here (main thread) and returns a function that
+    # writes reminders.csv, reminders.ics and history.csv, for an I/O thread
+    reminders = list(store.reminders())
+    history = list(store.tracker().items())
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+
+    def write():
+        os.makedirs(export_dir, exist_ok=True)
+        paths = [os.path.join(export_dir, f"{name}-{stamp}.{ext}")
+                 for name, ext in (("reminders", "csv"), ("reminders", "ics"), ("history", "csv"))]
+        writers = [(write_reminders_csv, reminders), (write_reminders_ics, reminders), (write_history_csv, history)]
+        for i, (writer, rows) in enumerate(writers):
+            writer(paths[i], rows)
+            if progress:
+                progress((i + 1) / len(writers))
+        return paths
+    return write
@@ -0,0 +1,54 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Loads may run side by side; writes go through one thread so they reach
+# the disk in the order they were queued
+LOAD_WORKERS = 2
+
+
+class IOExecutor:
+    # Runs file loads and saves off the UI thread. Results (or errors) are
+    # handed back through deliver(callback, delay), e.g. Clock.schedule_once,
+    # so callbacks always run on the main thread.
+    def __init__(self, deliver, load_workers=LOAD_WORKERS):
+        self.deliver = deliver
+        self.loads = ThreadPoolExecutor(max_workers=load_workers, thread_name_prefix="io-load")
+        self.writes = ThreadPoolExecutor(max_workers=1, thread_name_prefix="io-write")
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def load(self, func, on_done=None, on_error=None):
+        return self._submit(self.loads, func, on_done, on_error)
+
+    def write(self, func, on_done=None, on_error=None):
+        return self._submit(self.writes, func, on_done, on_error)
+
+    def _submit(self, pool, func, on_done, on_error):
+        with self._lock:
+            self._pending += 1
+        future = pool.submit(func)
+        future.add_done_callback(lambda f: self._finished(f, on_done, on_error))
+        return future
+
+    def _finished(self, future, on_done, on_error):
+        with self._lock:
+            self._pending -= 1
+        error = future.exception()
+        if error is not None:
+            callback = on_error or (lambda e: print("⚠️ Background I/O failed:", e))
+            self.deliver(lambda dt: callback(error), 0)
+        elif on_done is not None:
+            result = future.result()
+            self.deliver(lambda dt: on_done(result), 0)
+
+    @property
+    def pending(self):
+        return self._pending
+
+    def wait_writes(self):
+        # Blocks until every write queued so far is on disk
+        self.writes.submit(lambda: None).result()
+
+    def shutdown(self):
+        self.loads.shutdown(wait=True)
+        self.writes.shutdown(wait=True)
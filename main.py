@@ -1,89 +1,54 @@
-from kivy import Config
-
-# Stability & OpenGL fixes
-Config.set('graphics', 'multisamples', '0')
-Config.set('graphics', 'fullscreen', '0')
-Config.set('graphics', 'resizable', '1')
-Config.set('kivy', 'exit_on_escape', '0')
-Config.set('graphics', 'fbo', 'hardware')
-
-from kivy.uix.boxlayout import BoxLayout
-from kivymd.app import MDApp
-from kivymd.uix.screenmanager import MDScreenManager
-from kivy.uix.screenmanager import NoTransition
-from kivy.core.window import Window
-from kivymd.uix.button import MDIconButton
-from kivymd.uix.boxlayout import MDBoxLayout
-from kivymd.uix.label import MDLabel
-
-# Import screens
-from home import HomeScreen
-from dashboard import DashboardScreen
-from add_reminder import AddReminderScreen
-from view_reminders import ViewRemindersScreen
-from tracker import TrackerScreen
-from settings import SettingsScreen
-from edit_reminder import EditReminderScreen
+import perf_stats
+import startup_timing
+from perf_stats import timed_screen
+from startup_timing import span
+
+with span("config"):
+    from kivy import Config
+
+    # Stability & OpenGL fixes
+    Config.set('graphics', 'multisamples', '0')
+    Config.set('graphics', 'fullscreen', '0')
+    Config.set('graphics', 'resizable', '1')
+    Config.set('kivy', 'exit_on_escape', '0')
+    Config.set('graphics', 'fbo', 'hardware')
+
+with span("imports:kivy"):
+    from kivy.uix.boxlayout import BoxLayout
+    from kivymd.app import MDApp
+    from kivymd.uix.screenmanager import MDScreenManager
+    from kivy.uix.screenmanager import NoTransition
+    from kivy.core.window import Window
+    from kivy.clock import Clock
+    from importlib import import_module
+
+# Only the splash screen is imported up front; the rest load on first visit
+with span("imports:home"):
+    from home import HomeScreen
+
+with span("imports:data"):
+    from io_pool import IOExecutor
+    from store import ReminderStore
+    from scheduler import ReminderScheduler
+    from dashboard_stats import DashboardStats
+    from alerts import AlertService
+    from missed_sweeper import MissedDoseSweeper
+    from profiles import Profiles
+    from medicine_names import MedicineNames
 
 Window.size = (360, 640)
 
-
-class CustomBottomNav(MDBoxLayout):
-    def __init__(self, screen_manager_callback, active_screen, **kwargs):
-        super().__init__(orientation="horizontal", size_hint_y=None, height="70dp", padding="8dp", spacing=0, **kwargs)
-        self.screen_manager_callback = screen_manager_callback
-        self.current = active_screen
-        self.md_bg_color = MDApp.get_running_app().theme_cls.primary_color
-
-        self.items = {
-            "dashboard": ("home", "Home"),
-            "view_reminders": ("calendar", "View"),
-            "add_reminder": ("plus-box", "Add"),
-            "tracker": ("chart-line", "Tracker"),
-            "settings": ("cog", "Settings"),
-        }
-
-        self.buttons = {}
-
-        for key, (icon, label_text) in self.items.items():
-            btn_box = MDBoxLayout(
-                orientation="vertical",
-                spacing=2,
-                size_hint_x=1,
-                size_hint_y=None,
-                height="56dp",
-                padding=[0, 4, 0, 0]
-            )
-            icon_btn = MDIconButton(
-                icon=icon,
-                pos_hint={"center_x": 0.5},
-                on_release=lambda x, k=key: self.switch(k)
-            )
-            text_label = MDLabel(
-                text=label_text,
-                halign="center",
-                pos_hint={"center_x": 0.5},
-                font_style="Caption",
-                theme_text_color="Custom"
-            )
-            btn_box.add_widget(icon_btn)
-            btn_box.add_widget(text_label)
-            self.buttons[key] = (icon_btn, text_label)
-            self.add_widget(btn_box)
-
-        self.update_active()
-
-    def switch(self, screen_name):
-        self.current = screen_name
-        self.screen_manager_callback[screen_name]()
-        self.update_active()
-
-    def update_active(self):
-        for key, (icon_btn, label) in self.buttons.items():
-            is_active = key == self.current
-            icon_btn.theme_text_color = "Custom"
-            icon_btn.text_color = (1, 1, 1, 1) if is_active else (0.7, 0.7, 0.7, 1)
-            label.text_color = (1, 1, 1, 1) if is_active else (0.7, 0.7, 0.7, 1)
+# Screen name -> (module, class), constructed the first time it is shown
+SCREENS = {
+    "dashboard": ("dashboard", "DashboardScreen"),
+    "add_reminder": ("add_reminder", "AddReminderScreen"),
+    "view_reminders": ("view_reminders", "ViewRemindersScreen"),
+    "tracker": ("tracker", "TrackerScreen"),
+    "adherence": ("adherence", "AdherenceScreen"),
+    "settings": ("settings", "SettingsScreen"),
+    "edit_reminder": ("edit_reminder", "EditReminderScreen"),
+    "guide": ("guide", "GuideScreen"),
+}
 
 
 class MainLayout(BoxLayout):
@@ -95,61 +60,169 @@ class MainLayout(BoxLayout):
         self.sm = MDScreenManager(transition=NoTransition(), size_hint_y=1)
         self.add_widget(self.sm)
 
-        self.sm.add_widget(HomeScreen(name="home"))
-        self.sm.add_widget(DashboardScreen(name="dashboard"))
-        self.sm.add_widget(AddReminderScreen(name="add_reminder"))
-        self.sm.add_widget(ViewRemindersScreen(name="view_reminders"))
-        self.sm.add_widget(TrackerScreen(name="tracker"))
-        self.sm.add_widget(SettingsScreen(name="settings"))
-        self.sm.add_widget(EditReminderScreen(name="edit_reminder"))
-
-        nav_callbacks = {
-            "dashboard": lambda: self.switch("dashboard"),
-            "add_reminder": lambda: self.switch("add_reminder"),
-            "view_reminders": lambda: self.switch("view_reminders"),
-            "tracker": lambda: self.switch("tracker"),
-            "settings": lambda: self.switch("settings"),
-        }
-
-        self.navbar = CustomBottomNav(screen_manager_callback=nav_callbacks, active_screen="dashboard")
-        self.add_widget(self.navbar)
-
+        with span("screen:home"):
+            self.sm.add_widget(HomeScreen(name="home"))
         self.sm.current = "home"
-        self.update_navbar_visibility("home")
+
+        # The bottom nav is hidden on the splash, so it is built on first use
+        self.navbar = None
+
+    def load_screen(self, screen_name):
+        if not self.sm.has_screen(screen_name) and screen_name in SCREENS:
+            module_name, class_name = SCREENS[screen_name]
+            with span(f"screen:{screen_name}"), timed_screen(screen_name, "build"):
+                screen_class = getattr(import_module(module_name), class_name)
+                self.sm.add_widget(screen_class(name=screen_name))
+
+    def ensure_navbar(self):
+        if self.navbar is None:
+            from navbar import CustomBottomNav
+            nav_callbacks = {
+                "dashboard": lambda: self.switch("dashboard"),
+                "add_reminder": lambda: self.switch("add_reminder"),
+                "view_reminders": lambda: self.switch("view_reminders"),
+                "tracker": lambda: self.switch("tracker"),
+                "settings": lambda: self.switch("settings"),
+            }
+            self.navbar = CustomBottomNav(screen_manager_callback=nav_callbacks, active_screen="dashboard")
+            self.add_widget(self.navbar)
+        return self.navbar
 
     def update_navbar_visibility(self, screen_name):
-        self.navbar.opacity = 0 if screen_name == "home" else 1
-        self.navbar.disabled = screen_name == "home"
+        if self.navbar is None and screen_name == "home":
+            return
+        navbar = self.ensure_navbar()
+        navbar.opacity = 0 if screen_name == "home" else 1
+        navbar.disabled = screen_name == "home"
+
+    def show(self, screen_name):
+        if perf_stats.should_profile(screen_name):
+            perf_stats.profiled(screen_name, lambda: self.transition(screen_name))
+        else:
+            self.transition(screen_name)
+
+    def transition(self, screen_name):
+        self.load_screen(screen_name)
+        # on_pre_enter runs while the current screen is being set
+        with timed_screen(screen_name, "enter"):
+            self.sm.current = screen_name
+        self.update_navbar_visibility(screen_name)
+        if self.navbar is not None:
+            self.navbar.current = screen_name
+            self.navbar.update_active()
 
     def switch(self, screen_name):
         if self.sm.current != screen_name:
             self.nav_stack.append(self.sm.current)
-
-        self.sm.current = screen_name
-        self.navbar.current = screen_name
-        self.navbar.update_active()
-        self.update_navbar_visibility(screen_name)
+        self.show(screen_name)
 
     def go_back(self):
         if self.nav_stack:
-            prev_screen = self.nav_stack.pop()
-            self.sm.current = prev_screen
-            self.navbar.current = prev_screen
-            self.navbar.update_active()
-            self.update_navbar_visibility(prev_screen)
+            self.show(self.nav_stack.pop())
         else:
-            self.sm.current = "dashboard"
-            self.navbar.current = "dashboard"
-            self.navbar.update_active()
-            self.update_navbar_visibility("dashboard")
+            self.show("dashboard")
 
 
 class MedicineReminderApp(MDApp):
+    def build_config(self, config):
+        # [storage] backend = json | sqlite
+        # history_months = months of tracker history to keep, 0 keeps everything
+        config.setdefaults("storage", {"backend": "json", "history_months": "0"})
+
     def build(self):
+        with span("build"):
+            return self.build_root()
+
+    def build_root(self):
         self.theme_cls.primary_palette = "Teal"
         self.theme_cls.theme_style = "Light"
         self.edit_index = None
-        return MainLayout()
+        # Shared by every screen so tab switches reuse already-parsed data;
+        # it holds the open patient profile only
+        with span("build:store"):
+            self.profiles = Profiles()
+            self.store = ReminderStore(
+                data_dir=self.profiles.active_dir(),
+                backend=self.config.get("storage", "backend"),
+                schedule=Clock.schedule_once,
+                history_months=self.config.getint("storage", "history_months"),
+                io=IOExecutor(Clock.schedule_once)
+            )
+            self.profiles.attach(self.store)
+        # Watches every patient's doses through the merged profile view
+        self.scheduler = ReminderScheduler(self.profiles, Clock.schedule_once)
+        self.dashboard_stats = DashboardStats(self.store, Clock.schedule_once)
+        self.alerts = AlertService(self.store, Clock.schedule_once)
+        self.sweeper = MissedDoseSweeper(self.store, Clock.schedule_once)
+        # Built on first use by the Add Reminder name suggestions
+        self.medicine_names = MedicineNames(self.store)
+        # Memory-mapped medicine guide index, opened in on_start
+        self.guide = None
+        self.guide_error = None
+        self.guide_waiting = []
+        with span("build:layout"):
+            return MainLayout()
+
+    def on_start(self):
+        # The data files are parsed on an I/O thread while the splash shows
+        with span("on_start"):
+            self.alerts.start()
+            self.scheduler.bind(self.alerts.on_reminders_due)
+            self.store.when_loaded(self.start_services)
+            from medicine_guide import open_guide
+            self.store.io.load(open_guide, on_done=self.guide_ready, on_error=self.guide_failed)
+        if startup_timing.enabled:
+            Window.bind(on_flip=self.on_first_frame)
+
+    def guide_ready(self, guide):
+        self.guide = guide
+        self.medicine_names.use_guide(guide)
+        self.run_guide_waiting()
+
+    def guide_failed(self, error):
+        # Waiting screens check guide_error and say the guide is unavailable
+        print("⚠️ Medicine guide unavailable:", error)
+        self.guide_error = error
+        self.run_guide_waiting()
+
+    def run_guide_waiting(self):
+        waiting, self.guide_waiting = self.guide_waiting, []
+        for callback in waiting:
+            callback()
+
+    def when_guide_ready(self, callback):
+        # callback() once the guide is open, or has failed to open
+        if self.guide is not None or self.guide_error is not None:
+            callback()
+        else:
+            self.guide_waiting.append(callback)
+
+    def start_services(self):
+        startup_timing.mark("data_loaded")
+        self.scheduler.start()
+        self.dashboard_stats.start()
+        self.sweeper.start()
+
+    def on_first_frame(self, *args):
+        Window.unbind(on_flip=self.on_first_frame)
+        startup_timing.report()
+
+    def on_pause(self):
+        # The OS may kill a paused app, so wait for the writes to land
+        self.store.flush(wait=True)
+        return True
+
+    def on_resume(self):
+        self.scheduler.wake()
+        self.dashboard_stats.wake()
+        self.sweeper.wake()
+
+    def on_stop(self):
+        self.scheduler.stop()
+        self.dashboard_stats.stop()
+        self.sweeper.stop()
+        self.alerts.stop()
+        self.store.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,266 @@
+import json
+import mmap
+import os
+import re
+import struct
+import tempfile
+from array import array
+
+from medicine_names import name_key
+from store import DATA_DIR, file_signature
+
+# Shipped with the app: [{"type", "description", "examples": "A, B"}, ...]
+GUIDE_FILE = os.path.join(DATA_DIR, "medicine_guide.json")
+# Binary search index built from GUIDE_FILE, rebuilt when that file changes.
+# It is opened with mmap, so only the pages a search touches are read in.
+INDEX_FILE = os.path.join(DATA_DIR, "cache", "medicine_guide.idx")
+
+# magic, source mtime_ns, source size, entries, terms, postings, names
+HEADER = struct.Struct("<4sqqIIII")
+MAGIC = b"MGI2"
+# Separates type, description and examples inside an entry record
+FIELD_SEP = "\x1f"
+FIELDS = ("type", "description", "examples")
+# Completions of the word being typed that are searched; "d" in a big
+# catalog would otherwise pull in every term starting with d. Past this the
+# results are flagged as truncated and the guide screen asks for more letters.
+MAX_PREFIX_TERMS = 100
+
+
+def tokenize(text):
+    return re.findall(r"\w+", text.casefold())
+
+
+def first_at_least(get, count, prefix):
+    # Index of the first of get(0) .. get(count - 1), sorted bytes, >= prefix
+    lo, hi = 0, count
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if get(mid) < prefix:
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+
+
+def pack_strings(strings):
+    # (offsets, blob) for a list of str, as stored in the index
+    blob = bytearray()
+    offsets = array("I", [0])
+    for text in strings:
+        blob += text.encode("utf-8")
+        offsets.append(len(blob))
+    return offsets, blob
+
+
+# === Building ===
+def build_index(src=GUIDE_FILE, dst=INDEX_FILE):
+    # Layout after the header (uint32 arrays in native byte order, since the
+    # index is a per-device cache):
+    #   entry offsets (entries + 1), term offsets (terms + 1),
+    #   posting offsets (terms + 1), postings, name key offsets (names + 1),
+    #   name offsets (names + 1), entry text, term text, name keys, names
+    # Names are the example medicines, sorted by name_key, for the Add
+    # Reminder suggestions.
+    signature = file_signature(src) or (0, 0)
+    try:
+        with open(src, "r", encoding="utf-8") as f:
+            guide = json.load(f)
+    except (OSError, ValueError):
+        guide = []
+
+    entry_blob = bytearray()
+    entry_offsets = array("I", [0])
+    postings_by_term = {}
+    names = {}
+    for entry in guide if isinstance(guide, list) else []:
+        if not isinstance(entry, dict):
+            continue
+        fields = [str(entry.get(name, "")).replace(FIELD_SEP, " ") for name in FIELDS]
+        entry_id = len(entry_offsets) - 1
+        for term in set(tokenize(" ".join(fields))):
+            postings_by_term.setdefault(term, array("I")).append(entry_id)
+        entry_blob += FIELD_SEP.join(fields).encode("utf-8")
+        entry_offsets.append(len(entry_blob))
+        for name in fields[2].split(","):
+            if name.strip():
+                names.setdefault(name_key(name), name.strip())
+
+    terms = sorted(postings_by_term)
+    term_offsets, term_blob = pack_strings(terms)
+    posting_offsets = array("I", [0])
+    postings = array("I")
+    for term in terms:
+        postings.extend(postings_by_term[term])
+        posting_offsets.append(len(postings))
+    name_keys = sorted(names)
+    name_key_offsets, name_key_blob = pack_strings(name_keys)
+    name_offsets, name_blob = pack_strings(names[key] for key in name_keys)
+
+    os.makedirs(os.path.dirname(dst), exist_ok=True)
+    tmp = f"{dst}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(HEADER.pack(
+            MAGIC, signature[0], signature[1], len(entry_offsets) - 1, len(terms), len(postings), len(name_keys)
+        ))
+        for part in (entry_offsets, term_offsets, posting_offsets, postings, name_key_offsets, name_offsets):
+            part.tofile(f)
+        for blob in (entry_blob, term_blob, name_key_blob, name_blob):
+            f.write(blob)
+    os.replace(tmp, dst)
+
+
+def index_is_current(src=GUIDE_FILE, dst=INDEX_FILE):
+    try:
+        with open(dst, "rb") as f:
+            header = f.read(HEADER.size)
+    except OSError:
+        return False
+    if len(header) != HEADER.size:
+        return False
+    magic, mtime, size = HEADER.unpack(header)[:3]
+    return magic == MAGIC and (mtime, size) == (file_signature(src) or (0, 0))
+
+
+# === Reading ===
+class MedicineGuide:
+    # Read-only view of the index file. The offset and posting arrays are
+    # memoryviews straight into the mapping; entries are decoded one at a
+    # time when shown, so memory use does not grow with the catalog.
+    def __init__(self, path=INDEX_FILE):
+        with open(path, "rb") as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self.map)
+        _, _, _, self.count, self.term_count, posting_count, self.name_count = HEADER.unpack_from(self.map)
+
+        pos = HEADER.size
+
+        def section(length):
+            nonlocal pos
+            part = view[pos:pos + length * 4].cast("I")
+            pos += length * 4
+            return part
+
+        self.entry_offsets = section(self.count + 1)
+        self.term_offsets = section(self.term_count + 1)
+        self.posting_offsets = section(self.term_count + 1)
+        self.postings = section(posting_count)
+        self.name_key_offsets = section(self.name_count + 1)
+        self.name_offsets = section(self.name_count + 1)
+        self.entry_base = pos
+        self.term_base = self.entry_base + self.entry_offsets[self.count]
+        self.name_key_base = self.term_base + self.term_offsets[self.term_count]
+        self.name_base = self.name_key_base + self.name_key_offsets[self.name_count]
+
+    def __len__(self):
+        return self.count
+
+    def close(self):
+        for part in (self.entry_offsets, self.term_offsets, self.posting_offsets, self.postings,
+                     self.name_key_offsets, self.name_offsets):
+            part.release()
+        self.map.close()
+
+    def entry(self, entry_id):
+        start = self.entry_base + self.entry_offsets[entry_id]
+        end = self.entry_base + self.entry_offsets[entry_id + 1]
+        return dict(zip(FIELDS, self.map[start:end].decode("utf-8").split(FIELD_SEP)))
+
+    def term(self, i):
+        return self.map[self.term_base + self.term_offsets[i]:self.term_base + self.term_offsets[i + 1]]
+
+    def first_term(self, prefix):
+        # Index of the first term >= prefix (binary search over the mapping)
+        return first_at_least(self.term, self.term_count, prefix)
+
+    def posting(self, i):
+        # Sorted entry ids for term i, a view into the mapping
+        return self.postings[self.posting_offsets[i]:self.posting_offsets[i + 1]]
+
+    def exact(self, word):
+        prefix = word.encode("utf-8")
+        i = self.first_term(prefix)
+        if i < self.term_count and self.term(i) == prefix:
+            return self.posting(i)
+        return self.postings[0:0]
+
+    def completions(self, word):
+        # (posting lists of the terms starting with word, whether more terms
+        # past MAX_PREFIX_TERMS were left out)
+        prefix = word.encode("utf-8")
+        i = self.first_term(prefix)
+        found = []
+        while i < self.term_count and self.term(i).startswith(prefix):
+            if len(found) == MAX_PREFIX_TERMS:
+                return found, True
+            found.append(self.posting(i))
+            i += 1
+        return found, False
+
+    def search(self, text):
+        # (ids, truncated): sorted ids of entries containing every word of
+        # text, the last one as a prefix since it may still be being typed,
+        # as a sequence to page through by slicing; truncated when that
+        # prefix had too many completions to search them all, so more
+        # entries may match. An empty query lists the whole guide.
+        words = tokenize(text)
+        if not words:
+            return range(self.count), False
+        lists = [self.exact(word) for word in set(words[:-1]) - {words[-1]}]
+        completions, truncated = self.completions(words[-1])
+        if not completions:
+            return [], False
+        if len(completions) == 1 and not lists:
+            # The common case: one word, one term; no copying at all
+            return completions[0], truncated
+        if len(completions) == 1:
+            lists.append(completions[0])
+            last = None
+        else:
+            last = set().union(*(posting.tolist() for posting in completions))
+        lists.sort(key=len)
+        result = set(lists[0].tolist()) if lists else last
+        for posting in lists[1:]:
+            result.intersection_update(posting.tolist())
+        if lists and last is not None:
+            result &= last
+        return sorted(result), truncated
+
+    # === Example names ===
+    def name_key(self, i):
+        return self.map[self.name_key_base + self.name_key_offsets[i]:self.name_key_base + self.name_key_offsets[i + 1]]
+
+    def name(self, i):
+        return self.map[self.name_base + self.name_offsets[i]:self.name_base + self.name_offsets[i + 1]].decode("utf-8")
+
+    def names_from(self, prefix):
+        # (key, name) of the example names whose key starts with prefix (a
+        # name_key), in key order; decoded one at a time as they are taken
+        encoded = prefix.encode("utf-8")
+        i = first_at_least(self.name_key, self.name_count, encoded)
+        while i < self.name_count and self.name_key(i).startswith(encoded):
+            yield self.name_key(i).decode("utf-8"), self.name(i)
+            i += 1
+
+    def find_name(self, key):
+        # The example name with this name_key, or None
+        encoded = key.encode("utf-8")
+        i = first_at_least(self.name_key, self.name_count, encoded)
+        if i < self.name_count and self.name_key(i) == encoded:
+            return self.name(i)
+        return None
+
+
+def open_guide(src=GUIDE_FILE, dst=INDEX_FILE):
+    # Builds the index if the guide changed; call from an I/O thread
+    if not index_is_current(src, dst):
+        try:
+            build_index(src, dst)
+        except OSError as e:
+            # data/cache not writable: keep the index in the temp directory
+            print("⚠️ Building the guide index in the temp directory:", e)
+            dst = os.path.join(tempfile.gettempdir(), os.path.basename(dst))
+            if not index_is_current(src, dst):
+                build_index(src, dst)
+    return MedicineGuide(dst)
+
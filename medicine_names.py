@@ -0,0 +1,116 @@
+from collections import Counter
+from bisect import bisect_left, insort
+
+# Suggestions shown under the medicine field
+SUGGESTION_LIMIT = 3
+# Matches up to this many are ranked by use; past that the first ones in
+# alphabetical order are shown, so a one-letter prefix stays cheap
+RANK_LIMIT = 500
+
+
+def name_key(name):
+    # "  ceTirizine  10mg" -> "cetirizine 10mg"
+    return " ".join(name.split()).casefold()
+
+
+class MedicineNames:
+    # Prefix index for medicine-name suggestions. Names used in the open
+    # profile's reminders are a sorted list of normalized names searched with
+    # bisect, built on first use and then kept up to date from store events.
+    # The medicine guide's example names are bisected in its memory-mapped
+    # index (once open, see medicine_guide.py) and never loaded as a whole.
+    # Names already used win over guide examples, and their spelling is the
+    # one suggested.
+    def __init__(self, store):
+        self.store = store
+        self.keys = None
+        # key -> (display name, times used in reminders)
+        self.names = {}
+        # The MedicineGuide
+        self.guide = None
+        store.bind(self.on_store_changed)
+
+    def use_guide(self, guide):
+        self.guide = guide
+
+    def build(self):
+        self.names = {}
+        used = Counter(reminder.get("medicine", "") for reminder in self.store.reminders())
+        for name, uses in used.most_common():
+            self.count(name, uses)
+        self.keys = sorted(self.names)
+
+    def warm(self):
+        if self.keys is None:
+            self.build()
+
+    def count(self, name, uses=1):
+        key = name_key(name)
+        if not key:
+            return None
+        display, total = self.names.get(key, (name.strip(), 0))
+        self.names[key] = (display, total + uses)
+        return key
+
+    def add_name(self, name):
+        key = self.count(name)
+        i = bisect_left(self.keys, key) if key else 0
+        if key and (i == len(self.keys) or self.keys[i] != key):
+            insort(self.keys, key)
+
+    def drop_name(self, name):
+        key = name_key(name)
+        if key not in self.names:
+            return
+        display, total = self.names[key]
+        if total > 1:
+            self.names[key] = (display, total - 1)
+            return
+        del self.names[key]
+        i = bisect_left(self.keys, key)
+        if i < len(self.keys) and self.keys[i] == key:
+            del self.keys[i]
+
+    def on_store_changed(self, event, **details):
+        if self.keys is None:
+            return
+        if event == "add":
+            self.add_name(details["reminder"].get("medicine", ""))
+        elif event == "edit":
+            self.drop_name((details.get("previous") or {}).get("medicine", ""))
+            self.add_name(details["reminder"].get("medicine", ""))
+        elif event == "delete":
+            self.drop_name(details["reminder"].get("medicine", ""))
+        elif event in ("import", "profile"):
+            # Rebuilt from the reminders on next use
+            self.keys = None
+
+    def suggest(self, text, limit=SUGGESTION_LIMIT):
+        prefix = name_key(text)
+        if not prefix:
+            return []
+        self.warm()
+        lo = bisect_left(self.keys, prefix)
+        hi = bisect_left(self.keys, prefix + "\uffff", lo)
+        matches = [key for key in self.keys[lo:min(hi, lo + RANK_LIMIT)] if key != prefix]
+        if hi - lo <= RANK_LIMIT:
+            matches.sort(key=lambda key: -self.names[key][1])
+        found = [self.names[key][0] for key in matches[:limit]]
+        if len(found) < limit and self.guide is not None:
+            # Then guide examples in alphabetical order
+            for key, name in self.guide.names_from(prefix):
+                if key != prefix and key not in self.names:
+                    found.append(name)
+                    if len(found) == limit:
+                        break
+        return found
+
+    def canonical(self, name):
+        # The spelling already in use for this name (or, failing that, the
+        # guide's), ignoring case and spaces
+        self.warm()
+        key = name_key(name)
+        if key in self.names:
+            return self.names[key][0]
+        found = self.guide.find_name(key) if self.guide is not None else None
+        return found or name.strip()
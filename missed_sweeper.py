@@ -0,0 +1,120 @@
+from datetime import datetime
+
+from events import Timer
+from recurrence import Occurrence, occurrences
+from timeutil import MINUTES_PER_DAY, epoch_minutes, from_epoch_minutes
+
+# How far back the first sweep after launch looks for unmarked doses
+MISSED_LOOKBACK_DAYS = 7
+# Used when the "missed_grace_minutes" setting is absent
+DEFAULT_GRACE_MINUTES = 2 * 60
+# Longest the sweeper sleeps when no dose is coming up
+IDLE_RECHECK = MINUTES_PER_DAY
+
+
+class MissedDoseSweeper:
+    # Records doses still unmarked a grace window after their time as
+    # missed. One timer is armed for the next dose's deadline; each sweep
+    # covers only the doses between the previous sweep and now, so every
+    # dose is looked at once, and a backlog (app closed or suspended) is
+    # marked in one batch that the store saves with a single write.
+    def __init__(self, store, schedule):
+        # schedule(callback, delay) -> event with cancel(), e.g. Clock.schedule_once
+        self.store = store
+        self.timer = Timer(schedule)
+        # Doses due before this minute (epoch minutes) have been swept
+        self.swept_until = None
+
+    def grace(self):
+        return int(self.store.settings().get("missed_grace_minutes", DEFAULT_GRACE_MINUTES))
+
+    def start(self):
+        self.store.bind(self.on_store_changed)
+        self.sweep()
+
+    def stop(self):
+        self.store.unbind(self.on_store_changed)
+        self.timer.cancel()
+
+    def on_store_changed(self, event, **details):
+        # A new or edited dose, or a new grace window, may move the next deadline
+        if event == "add":
+            # Its doses behind the watermark were never swept; reminders
+            # already using the name stand in for it up to their last dose
+            reminder = details["reminder"]
+            same_name = [r for r in self.store.reminders()
+                         if r is not reminder and r.get("medicine") == reminder.get("medicine")]
+            self.sweep_reminder(reminder, same_name)
+            self.arm()
+        elif event == "edit":
+            if details.get("previous") is not None:
+                self.sweep_reminder(details["reminder"], [details["previous"]])
+            self.arm()
+        elif event == "settings":
+            self.arm()
+        elif event == "profile" or (event == "import" and details.get("reminders")):
+            # Another patient's data, or many new reminders: sweep the backlog
+            # from scratch (doses already marked are left alone)
+            self.swept_until = None
+            self.sweep()
+
+    def lookback_start(self, now):
+        return now - now % MINUTES_PER_DAY - MISSED_LOOKBACK_DAYS * MINUTES_PER_DAY
+
+    def mark_missed(self, doses):
+        marked = 0
+        for occ in doses:
+            if self.store.get_status(*occ.tracker_key) is None:
+                self.store.set_status(*occ.tracker_key, "missed")
+                marked += 1
+        return marked
+
+    def sweep(self, *args):
+        now = epoch_minutes(datetime.now())
+        cutoff = now - self.grace() + 1
+        start = self.swept_until
+        if start is None:
+            start = self.lookback_start(now)
+
+        marked = 0
+        if cutoff > start:
+            marked = self.mark_missed(self.store.occurrences(start, cutoff))
+            self.swept_until = cutoff
+        self.arm()
+        return marked
+
+    def sweep_reminder(self, reminder, replaces=()):
+        # One reminder's doses in the lookback window up to the watermark.
+        # replaces: reminders whose swept doses already account for this one
+        # (the version before an edit, or others with the same name); only
+        # doses after their last swept one are marked, and none at all if
+        # the dose times are unchanged (a rename)
+        if self.swept_until is None:
+            return 0
+        start = self.lookback_start(epoch_minutes(datetime.now()))
+        times = list(occurrences(reminder, start, self.swept_until))
+        last = None
+        for other in replaces:
+            swept = list(occurrences(other, start, self.swept_until))
+            if swept == times:
+                return 0
+            if swept and (last is None or swept[-1] > last):
+                last = swept[-1]
+        if last is not None:
+            times = [at for at in times if at > last]
+        return self.mark_missed(Occurrence(reminder, at) for at in times)
+
+    def wake(self):
+        # App resumed: mark whatever came due while suspended in one pass
+        if self.swept_until is not None:
+            self.sweep()
+
+    def arm(self):
+        if self.swept_until is None:
+            self.timer.cancel()
+            return
+        grace = self.grace()
+        upcoming = next(iter(self.store.occurrences(self.swept_until, self.swept_until + IDLE_RECHECK)), None)
+        deadline = upcoming.at + grace if upcoming else self.swept_until + grace + IDLE_RECHECK
+        delay = (from_epoch_minutes(deadline) - datetime.now()).total_seconds()
+        self.timer.start(self.sweep, delay)
@@ -0,0 +1,62 @@
+from kivymd.app import MDApp
+from kivymd.uix.button import MDIconButton
+from kivymd.uix.boxlayout import MDBoxLayout
+from kivymd.uix.label import MDLabel
+
+
+class CustomBottomNav(MDBoxLayout):
+    def __init__(self, screen_manager_callback, active_screen, **kwargs):
+        super().__init__(orientation="horizontal", size_hint_y=None, height="70dp", padding="8dp", spacing=0, **kwargs)
+        self.screen_manager_callback = screen_manager_callback
+        self.current = active_screen
+        self.md_bg_color = MDApp.get_running_app().theme_cls.primary_color
+
+        self.items = {
+            "dashboard": ("home", "Home"),
+            "view_reminders": ("calendar", "View"),
+            "add_reminder": ("plus-box", "Add"),
+            "tracker": ("chart-line", "Tracker"),
+            "settings": ("cog", "Settings"),
+        }
+
+        self.buttons = {}
+
+        for key, (icon, label_text) in self.items.items():
+            btn_box = MDBoxLayout(
+                orientation="vertical",
+                spacing=2,
+                size_hint_x=1,
+                size_hint_y=None,
+                height="56dp",
+                padding=[0, 4, 0, 0]
+            )
+            icon_btn = MDIconButton(
+                icon=icon,
+                pos_hint={"center_x": 0.5},
+                on_release=lambda x, k=key: self.switch(k)
+            )
+            text_label = MDLabel(
+                text=label_text,
+                halign="center",
+                pos_hint={"center_x": 0.5},
+                font_style="Caption",
+                theme_text_color="Custom"
+            )
+            btn_box.add_widget(icon_btn)
+            btn_box.add_widget(text_label)
+            self.buttons[key] = (icon_btn, text_label)
+            self.add_widget(btn_box)
+
+        self.update_active()
+
+    def switch(self, screen_name):
+        self.current = screen_name
+        self.screen_manager_callback[screen_name]()
+        self.update_active()
+
+    def update_active(self):
+        for key, (icon_btn, label) in self.buttons.items():
+            is_active = key == self.current
+            icon_btn.theme_text_color = "Custom"
+            icon_btn.text_color = (1, 1, 1, 1) if is_active else (0.7, 0.7, 0.7, 1)
+            label.text_color = (1, 1, 1, 1) if is_active else (0.7, 0.7, 0.7, 1)
@@ -0,0 +1,83 @@
+import os
+import time
+
+# In-process counters for file access and screen work, shown in the hidden
+# debug section of Settings. Recording is a dict update, so it stays on.
+io_stats = {}
+screen_stats = {}
+
+# MEDICINE_REMINDER_PROFILE=1 profiles every screen transition, or a comma
+# separated list of screen names only those; the debug switch sets this too
+PROFILE_ENV_VAR = "MEDICINE_REMINDER_PROFILE"
+PROFILE_DIR = os.path.join("data", "profiles")
+profile_screens = set(filter(None, os.environ.get(PROFILE_ENV_VAR, "").split(",")))
+
+
+def _add(table, key, seconds, nbytes=0):
+    entry = table.get(key)
+    if entry is None:
+        entry = table[key] = {"count": 0, "bytes": 0, "total_ms": 0.0, "max_ms": 0.0}
+    ms = seconds * 1000
+    entry["count"] += 1
+    entry["bytes"] += nbytes
+    entry["total_ms"] += ms
+    if ms > entry["max_ms"]:
+        entry["max_ms"] = ms
+
+
+def record_io(op, path, nbytes, seconds):
+    # op: "read", "write" or "append"
+    _add(io_stats, (op, os.path.basename(path)), seconds, nbytes)
+
+
+def record_screen(name, phase, seconds):
+    # phase: "build" or "enter"
+    _add(screen_stats, (name, phase), seconds)
+
+
+def reset():
+    io_stats.clear()
+    screen_stats.clear()
+
+
+def summary(limit=8):
+    # Text for the debug section, slowest totals first
+    lines = ["File access (count, KB, total / max ms):"]
+    for (op, name), e in sorted(io_stats.items(), key=lambda item: -item[1]["total_ms"])[:limit]:
+        lines.append(f"  {op} {name}: {e['count']}x, {e['bytes'] / 1024:.1f} KB, {e['total_ms']:.1f} / {e['max_ms']:.1f}")
+    lines.append("Screens (count, total / max ms):")
+    for (name, phase), e in sorted(screen_stats.items(), key=lambda item: -item[1]["total_ms"])[:limit]:
+        lines.append(f"  {name} {phase}: {e['count']}x, {e['total_ms']:.1f} / {e['max_ms']:.1f}")
+    return "\n".join(lines)
+
+
+def should_profile(screen_name):
+    return "1" in profile_screens or screen_name in profile_screens
+
+
+def profiled(screen_name, func):
+    # Runs func() under cProfile and writes data/profiles/<screen>-<time>.pstats
+    import cProfile
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(func)
+    finally:
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        path = os.path.join(PROFILE_DIR, f"{screen_name}-{time.strftime('%Y%m%d-%H%M%S')}.pstats")
+        profiler.dump_stats(path)
+        print("🧪 Profile written to", path)
+
+
+class timed_screen:
+    # with timed_screen("tracker", "enter"): ...
+    def __init__(self, name, phase):
+        self.name = name
+        self.phase = phase
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        record_screen(self.name, self.phase, time.perf_counter() - self.start)
+        return False
@@ -0,0 +1,173 @@
+import heapq
+import os
+import re
+from datetime import datetime
+
+from events import EventSource
+from recurrence import expand
+from store import DATA_DIR, CachedJsonFile
+
+# data/profiles.json lists the patients and which one is open
+PROFILES_FILE = "profiles.json"
+# Other patients' files go under data/patients/<id>/ (data/profiles holds
+# cProfile output, see perf_stats); the first profile keeps the files
+# directly in data/, where older versions put them
+PATIENTS_DIR = "patients"
+DEFAULT_PROFILE = "default"
+# Per profile: the reminders that can still fire, all the scheduler needs
+# from a patient that is not open
+UPCOMING_FILE = "upcoming.json"
+
+
+def _load_profiles(data):
+    if not isinstance(data, dict) or not data.get("profiles"):
+        data = {"active": DEFAULT_PROFILE, "profiles": [{"id": DEFAULT_PROFILE, "name": "Me"}]}
+    return data
+
+
+def _load_upcoming(data):
+    return data if isinstance(data, list) else []
+
+
+def make_profile_id(name, taken):
+    base = re.sub(r"[^a-z0-9]+", "-", name.lower()).strip("-") or "patient"
+    profile_id, n = base, 2
+    while profile_id in taken:
+        profile_id = f"{base}-{n}"
+        n += 1
+    return profile_id
+
+
+class Profiles(EventSource):
+    # Patients managed on this device. Only the open profile is loaded into
+    # the store; every other one is represented by its small upcoming.json,
+    # and occurrences() merges them all into one time-ordered view, so the
+    # scheduler watches every patient without loading their history.
+    # Same bind/occurrences interface the scheduler uses on a store:
+    # listeners hear the open store's "add", "edit", "delete" and "import"
+    # (added reminders tagged with their profile), "profile" after a switch
+    # and "profiles" when one is added.
+    def __init__(self, data_dir=DATA_DIR):
+        super().__init__()
+        self.data_dir = data_dir
+        self.file = CachedJsonFile(os.path.join(data_dir, PROFILES_FILE), _load_profiles)
+        self.store = None
+        self.upcoming_files = {}
+
+    def attach(self, store):
+        # store: the ReminderStore opened on active_dir()
+        self.store = store
+        store.bind(self.on_store_changed)
+        store.when_loaded(self.check_upcoming)
+
+    # === Registry ===
+    def profiles(self):
+        # [{"id": ..., "name": ...}, ...]
+        return self.file.get()["profiles"]
+
+    @property
+    def active(self):
+        return self.file.get()["active"]
+
+    def name(self, profile_id):
+        for profile in self.profiles():
+            if profile["id"] == profile_id:
+                return profile["name"]
+        return None
+
+    def profile_dir(self, profile_id):
+        if profile_id == DEFAULT_PROFILE:
+            return self.data_dir
+        return os.path.join(self.data_dir, PATIENTS_DIR, profile_id)
+
+    def active_dir(self):
+        return self.profile_dir(self.active)
+
+    def add(self, name):
+        profile_id = make_profile_id(name, {p["id"] for p in self.profiles()})
+        os.makedirs(self.profile_dir(profile_id), exist_ok=True)
+        self.profiles().append({"id": profile_id, "name": name})
+        self.file.save()
+        self.dispatch("profiles")
+        return profile_id
+
+    def switch(self, profile_id):
+        # The store saves the open profile and loads this one; listeners
+        # hear "profile" once it is in memory
+        if profile_id == self.active or self.name(profile_id) is None:
+            return
+        self.file.get()["active"] = profile_id
+        self.file.save()
+        self.store.switch_data_dir(self.profile_dir(profile_id))
+
+    # === Change notifications ===
+    def on_store_changed(self, event, **details):
+        if event == "add":
+            self.mark_upcoming_dirty()
+            self.dispatch("add", reminder=self.tag(details["reminder"], self.active))
+        elif event in ("edit", "delete"):
+            self.mark_upcoming_dirty()
+            self.dispatch(event)
+        elif event == "import" and details.get("reminders"):
+            self.mark_upcoming_dirty()
+            self.dispatch("import")
+        elif event == "profile":
+            self.check_upcoming()
+            self.dispatch("profile")
+
+    # === Upcoming index ===
+    def upcoming_file(self, profile_id):
+        upcoming = self.upcoming_files.get(profile_id)
+        if upcoming is None:
+            upcoming = CachedJsonFile(
+                os.path.join(self.profile_dir(profile_id), UPCOMING_FILE), _load_upcoming, io=self.store.io
+            )
+            upcoming.indent = None
+            self.upcoming_files[profile_id] = upcoming
+        return upcoming
+
+    def upcoming_reminders(self):
+        # Rules plus one-off reminders dated today or later, from the open store
+        backend = self.store.backend
+        today = datetime.now().strftime("%Y-%m-%d")
+        return backend.recurring_reminders() + backend.reminders_between(today, "9999-12-31")
+
+    def write_upcoming(self, profile_id):
+        upcoming = self.upcoming_file(profile_id)
+        upcoming.data = self.upcoming_reminders()
+        upcoming.save()
+
+    def mark_upcoming_dirty(self):
+        # Batched with the store's other saves, which a switch flushes first
+        profile_id = self.active
+        self.store.writer.mark_dirty("upcoming", lambda: self.write_upcoming(profile_id))
+
+    def check_upcoming(self):
+        # Profiles opened by older versions have no index yet
+        if not os.path.exists(self.upcoming_file(self.active).path):
+            self.write_upcoming(self.active)
+
+    # === Merged view ===
+    def tag(self, reminder, profile_id):
+        # With one patient reminders pass through untouched; otherwise a
+        # copy names the patient (shown in alerts, part of notification keys)
+        if len(self.profiles()) < 2:
+            return reminder
+        return dict(reminder, profile=profile_id, patient=self.name(profile_id))
+
+    def tag_all(self, doses, profile_id):
+        tagged = {}
+        for occ in doses:
+            reminder = tagged.get(id(occ.reminder))
+            if reminder is None:
+                reminder = tagged[id(occ.reminder)] = self.tag(occ.reminder, profile_id)
+            yield occ._replace(reminder=reminder)
+
+    def occurrences(self, start, end):
+        # Doses in [start, end) of every patient, in time order
+        streams = [self.tag_all(self.store.occurrences(start, end), self.active)]
+        for profile in self.profiles():
+            if profile["id"] != self.active:
+                reminders = self.upcoming_file(profile["id"]).get()
+                streams.append(self.tag_all(expand(reminders, start, end), profile["id"]))
+        return heapq.merge(*streams, key=lambda occ: occ.at)
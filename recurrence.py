@@ -0,0 +1,196 @@
+import heapq
+from collections import namedtuple
+
+from timeutil import MINUTES_PER_DAY, date_string, format_time, from_epoch_minutes, parse_date, parse_time, reminder_minutes, weekday
+
+# A reminder may carry a "repeat" rule; its "date"/"time" are the first dose.
+#   {"type": "daily", "interval": 1}       every N days
+#   {"type": "hourly", "interval": 8}      every N hours
+#   {"type": "weekly", "weekdays": [0, 2]} on these weekdays (Mon = 0)
+# plus an optional "course_days": N, after which the rule stops.
+RULE_TYPES = ("daily", "hourly", "weekly")
+WEEKDAYS = ["mon", "tue", "wed", "thu", "fri", "sat", "sun"]
+
+
+class Occurrence(namedtuple("Occurrence", "reminder at")):
+    # at: dose time in epoch minutes (see timeutil)
+    @property
+    def when(self):
+        return from_epoch_minutes(self.at)
+
+    @property
+    def medicine(self):
+        return self.reminder.get("medicine")
+
+    @property
+    def date_str(self):
+        return date_string(self.at // MINUTES_PER_DAY)
+
+    @property
+    def time_str(self):
+        if "repeat" in self.reminder:
+            return format_time(self.at % MINUTES_PER_DAY)
+        return self.reminder.get("time")
+
+    @property
+    def dose(self):
+        # One-off reminders are tracked per medicine per day as before; a rule
+        # can produce several doses a day, so its doses also carry the time.
+        if "repeat" in self.reminder:
+            return f"{self.medicine}_{self.time_str}"
+        return self.medicine
+
+    @property
+    def tracker_key(self):
+        # (date, dose) address in the tracker index
+        return self.date_str, self.dose
+
+    @property
+    def patient(self):
+        # Set on doses from the merged profile view (profiles.py) once there
+        # are several patients
+        return self.reminder.get("patient")
+
+    @property
+    def notification_key(self):
+        key = f"{self.medicine}_{self.date_str}_{self.time_str}"
+        if "profile" in self.reminder:
+            return f"{self.reminder['profile']}:{key}"
+        return key
+
+
+def occurrences(reminder, start, end=None):
+    # Yields the reminder's dose times (epoch minutes) in [start, end), in
+    # order, generating only what falls inside the window. end=None leaves it
+    # open (take what you need).
+    first = reminder_minutes(reminder)
+    if first is None:
+        return
+    rule = reminder.get("repeat")
+    if not rule:
+        if first >= start and (end is None or first < end):
+            yield first
+        return
+
+    first_day, time_of_day = divmod(first, MINUTES_PER_DAY)
+    if rule.get("course_days"):
+        stop = (first_day + int(rule["course_days"])) * MINUTES_PER_DAY
+        if end is None or stop < end:
+            end = stop
+
+    kind = rule.get("type")
+    if kind in ("daily", "hourly"):
+        unit = 60 if kind == "hourly" else MINUTES_PER_DAY
+        step = max(int(rule.get("interval", 1)), 1) * unit
+        # Jump straight to the first dose inside the window
+        at = first + max(0, -((first - start) // step)) * step
+        while end is None or at < end:
+            yield at
+            at += step
+    elif kind == "weekly":
+        weekdays = set(rule.get("weekdays") or [weekday(first_day)])
+        day = max(first_day, start // MINUTES_PER_DAY)
+        while True:
+            at = day * MINUTES_PER_DAY + time_of_day
+            if end is not None and at >= end:
+                return
+            if weekday(day) in weekdays and at >= start:
+                yield at
+            day += 1
+
+
+def _occurrence_stream(reminder, start, end):
+    for at in occurrences(reminder, start, end):
+        yield Occurrence(reminder, at)
+
+
+def expand(reminders, start, end):
+    # All doses in [start, end) across reminders, merged lazily in time order
+    streams = [_occurrence_stream(r, start, end) for r in reminders]
+    return heapq.merge(*streams, key=lambda occ: occ.at)
+
+
+def next_occurrence(reminder, now_minutes):
+    # First dose strictly after now_minutes
+    return next(occurrences(reminder, now_minutes + 1), None)
+
+
+def parse_rule(repeat_text, course_text=""):
+    # "" -> None, "daily", "every 2 days", "every 8 hours", "mon,wed,fri"
+    text = repeat_text.strip().lower()
+    if not text or text in ("none", "once"):
+        rule = None
+    elif text == "daily":
+        rule = {"type": "daily", "interval": 1}
+    elif text.startswith("every "):
+        parts = text.split()
+        if len(parts) != 3 or not parts[1].isdigit() or int(parts[1]) < 1:
+            raise ValueError("Use 'every N hours' or 'every N days'")
+        unit = parts[2].rstrip("s")
+        if unit not in ("hour", "day"):
+            raise ValueError("Use 'every N hours' or 'every N days'")
+        rule = {"type": "hourly" if unit == "hour" else "daily", "interval": int(parts[1])}
+    else:
+        names = [p.strip()[:3] for p in text.replace(" ", ",").split(",") if p.strip()]
+        if not names or any(n not in WEEKDAYS for n in names):
+            raise ValueError("Unknown repeat rule")
+        rule = {"type": "weekly", "weekdays": sorted({WEEKDAYS.index(n) for n in names})}
+
+    course = course_text.strip()
+    if course:
+        if not course.isdigit() or int(course) < 1:
+            raise ValueError("Course length must be a number of days")
+        if rule is None:
+            rule = {"type": "daily", "interval": 1}
+        rule["course_days"] = int(course)
+    return rule
+
+
+def rule_text(rule):
+    # (repeat_text, course_text) that parse_rule reads back into the same rule
+    if not rule:
+        return "", ""
+    kind = rule.get("type")
+    interval = int(rule.get("interval", 1))
+    if kind == "hourly":
+        text = f"every {interval} hours"
+    elif kind == "daily":
+        text = "daily" if interval == 1 else f"every {interval} days"
+    else:
+        text = ",".join(WEEKDAYS[d] for d in rule.get("weekdays", []))
+    return text, str(rule.get("course_days") or "")
+
+
+def make_reminder(medicine, time_text, date_text, repeat_text="", course_text=""):
+    # The checks behind the Add Reminder form, shared with bulk import.
+    # Raises ValueError with a message fit for the user.
+    medicine, time_text, date_text = medicine.strip(), time_text.strip(), date_text.strip()
+    if not medicine or not time_text or not date_text:
+        raise ValueError("Please fill in all fields")
+    day = parse_date(date_text)
+    if day is None:
+        raise ValueError("Invalid date format. Use YYYY-MM-DD")
+    if parse_time(time_text) is None:
+        raise ValueError("Invalid time format. Use e.g. 8:00 AM")
+
+    reminder = {"medicine": medicine, "time": time_text, "date": date_string(day)}
+    rule = parse_rule(repeat_text, course_text)
+    if rule:
+        reminder["repeat"] = rule
+    return reminder
+
+
+def describe_rule(rule):
+    if not rule:
+        return ""
+    kind = rule.get("type")
+    interval = int(rule.get("interval", 1))
+    if kind == "hourly":
+        text = f"Every {interval} hours"
+    elif kind == "daily":
+        text = "Daily" if interval == 1 else f"Every {interval} days"
+    else:
+        text = ", ".join(WEEKDAYS[d].capitalize() for d in rule.get("weekdays", []))
+    if rule.get("course_days"):
+        text += f" for {rule['course_days']} days"
+    return text
@@ -0,0 +1,110 @@
+import heapq
+from datetime import datetime
+
+from events import Timer
+from recurrence import Occurrence, occurrences
+from timeutil import epoch_minutes, from_epoch_minutes
+
+# How far ahead (in minutes) recurring rules are expanded into the heap at a time
+HORIZON = 24 * 60
+
+
+class ReminderScheduler:
+    # Keeps upcoming doses in a min-heap and arms a single timer for the
+    # earliest one. Nothing runs between doses; the heap is rebuilt only when
+    # the store reports a reminder change or the expansion horizon runs out.
+    def __init__(self, store, schedule):
+        # schedule(callback, delay) -> event with cancel(), e.g. Clock.schedule_once
+        self.store = store
+        self.timer = Timer(schedule)
+        self.heap = []
+        # notification_key -> minute of the doses fired in the last_check minute,
+        # the only ones a rebuild can put back in the heap
+        self.fired = {}
+        self.listeners = []
+        # Doses that came due before anyone was listening (screens load lazily)
+        self.backlog = []
+        self.last_check = epoch_minutes(datetime.now())
+        self.horizon_end = self.last_check
+        self._seq = 0
+
+    def bind(self, callback):
+        # callback(due) with due a list of Occurrence
+        self.listeners.append(callback)
+        if self.backlog:
+            due, self.backlog = self.backlog, []
+            callback(due)
+
+    def start(self):
+        self.store.bind(self.on_store_changed)
+        self.rebuild()
+
+    def stop(self):
+        self.store.unbind(self.on_store_changed)
+        self.timer.cancel()
+
+    def on_store_changed(self, event, **details):
+        if event == "add":
+            self.push(details["reminder"], self.last_check, self.horizon_end)
+            self.arm()
+        elif event in ("edit", "delete", "import", "profile", "profiles"):
+            self.rebuild()
+
+    # === Heap maintenance ===
+    # last_check is the minute of the last check (epoch minutes); doses in
+    # that minute may not have fired yet, so windows start there.
+    def push(self, reminder, start, end):
+        for at in occurrences(reminder, start, end):
+            self._seq += 1
+            heapq.heappush(self.heap, (at, self._seq, Occurrence(reminder, at)))
+
+    def rebuild(self):
+        self.heap = []
+        self.horizon_end = epoch_minutes(datetime.now()) + HORIZON
+        for occ in self.store.occurrences(self.last_check, self.horizon_end):
+            self._seq += 1
+            self.heap.append((occ.at, self._seq, occ))
+        heapq.heapify(self.heap)
+        self.check()
+
+    def extend_horizon(self, now):
+        start, self.horizon_end = self.horizon_end, now + HORIZON
+        for occ in self.store.occurrences(start, self.horizon_end):
+            self._seq += 1
+            heapq.heappush(self.heap, (occ.at, self._seq, occ))
+
+    # === Firing ===
+    def check(self, *args):
+        # Fires everything due up to now, including doses a late or suspended
+        # timer would otherwise skip, then re-arms for the next one.
+        now = epoch_minutes(datetime.now())
+        if now + HORIZON // 2 >= self.horizon_end:
+            self.extend_horizon(now)
+
+        due = []
+        while self.heap and self.heap[0][0] <= now:
+            occ = heapq.heappop(self.heap)[2]
+            if occ.notification_key not in self.fired:
+                self.fired[occ.notification_key] = occ.at
+                due.append(occ)
+        self.last_check = now
+        # The heap never goes back before last_check
+        self.fired = {key: at for key, at in self.fired.items() if at >= now}
+
+        if due and not self.listeners:
+            self.backlog.extend(due)
+        elif due:
+            for callback in list(self.listeners):
+                callback(due)
+        self.arm()
+
+    def wake(self):
+        # App resumed: the timer may not have run while suspended
+        self.check()
+
+    def arm(self):
+        wake_at = self.horizon_end - HORIZON // 2
+        if self.heap and self.heap[0][0] < wake_at:
+            wake_at = self.heap[0][0]
+        delay = (from_epoch_minutes(wake_at) - datetime.now()).total_seconds()
+        self.timer.start(self.check, delay)
@@ -1,30 +1,34 @@
-import json
-import os
 from kivymd.uix.screen import MDScreen
 from kivymd.uix.label import MDLabel
 from kivymd.uix.boxlayout import MDBoxLayout
 from kivymd.uix.card import MDCard
 from kivymd.uix.selectioncontrol import MDSwitch
-from kivymd.uix.button import MDRaisedButton
+from kivymd.uix.textfield import MDTextField
+from kivymd.uix.button import MDRaisedButton, MDFlatButton
 from kivymd.uix.scrollview import MDScrollView
+from kivymd.uix.progressbar import MDProgressBar
+from kivymd.uix.dialog import MDDialog
+from kivymd.uix.snackbar import Snackbar
 from kivy.uix.widget import Widget
 from kivy.metrics import dp
+from kivy.clock import Clock
 from kivymd.app import MDApp
-from kivy.core.audio import SoundLoader
-from plyer import vibrator
+import os
+import perf_stats
 
-SETTINGS_FILE = os.path.join("data", "settings.json")
+# Taps on the Settings title that reveal the debug section
+DEBUG_TAPS = 7
+# Where Export writes reminders.csv, reminders.ics and history.csv
+EXPORT_DIR = os.path.join("data", "exports")
 
 class SettingsScreen(MDScreen):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
-        self.settings = {
-            "sound": True,
-            "vibration": True,
-            "notifications": True,
-            "dark_mode": False
-        }
         self.switch_refs = {}
+        self.title_taps = 0
+        self.debug_card = None
+        self.file_manager = None
+        self.result_dialog = None
         self.load_settings()
         self.sound_enabled = self.settings["sound"]
         self.vibration_enabled = self.settings["vibration"]
@@ -75,13 +79,15 @@ class SettingsScreen(MDScreen):
         )
         reminder_card.bind(minimum_height=reminder_card.setter("height"))
 
-        reminder_card.add_widget(MDLabel(
+        title = MDLabel(
             text="Settings",
             halign="center",
             font_style="H5",
             size_hint_y=None,
             height=dp(40)
-        ))
+        )
+        title.bind(on_touch_down=self.on_title_touch)
+        reminder_card.add_widget(title)
 
         reminder_card.add_widget(MDLabel(
             text="Reminder Notifications",
@@ -119,8 +125,55 @@ class SettingsScreen(MDScreen):
         ))
 
         notif_card.add_widget(toggle_row("Enable Notifications", "notifications", self.toggle_notifications))
+
+        self.grace_input = MDTextField(
+            hint_text="Mark missed after (minutes)",
+            text=str(self.settings["missed_grace_minutes"]),
+            input_filter="int",
+            mode="rectangle"
+        )
+        self.grace_input.bind(on_text_validate=self.set_missed_grace, focus=self.on_grace_focus)
+        notif_card.add_widget(self.grace_input)
         content.add_widget(notif_card)
 
+        # === Import / Export Card ===
+        data_card = MDCard(
+            orientation="vertical",
+            padding=dp(20),
+            spacing=dp(20),
+            radius=[dp(15)],
+            elevation=3,
+            size_hint_y=None
+        )
+        data_card.bind(minimum_height=data_card.setter("height"))
+
+        data_card.add_widget(MDLabel(
+            text="Import / Export",
+            font_style="H6",
+            bold=True,
+            theme_text_color="Custom",
+            text_color=(0.2, 0.3, 0.4, 1),
+            size_hint_y=None,
+            height=dp(30)
+        ))
+        data_card.add_widget(MDLabel(
+            text="Reminders as CSV or .ics, history as CSV (date, dose, status)",
+            font_style="Caption",
+            size_hint_y=None,
+            height=dp(30)
+        ))
+
+        self.transfer_progress = MDProgressBar(value=0, size_hint_y=None, height=dp(4), opacity=0)
+        data_card.add_widget(self.transfer_progress)
+
+        data_buttons = MDBoxLayout(orientation="horizontal", spacing=dp(10), size_hint_y=None, height=dp(50))
+        self.import_btn = MDRaisedButton(text="Import", on_release=lambda x: self.open_import())
+        self.export_btn = MDRaisedButton(text="Export", on_release=lambda x: self.export_data())
+        data_buttons.add_widget(self.import_btn)
+        data_buttons.add_widget(self.export_btn)
+        data_card.add_widget(data_buttons)
+        content.add_widget(data_card)
+
         # === Theme Mode Card ===
         theme_card = MDCard(
             orientation="vertical",
@@ -146,6 +199,7 @@ class SettingsScreen(MDScreen):
         content.add_widget(theme_card)
 
         content.add_widget(Widget(size_hint_y=None, height=dp(20)))
+        self.content = content
 
         back_btn = MDRaisedButton(
             text="Back",
@@ -161,6 +215,15 @@ class SettingsScreen(MDScreen):
         scroll.add_widget(content)
         self.add_widget(scroll)
 
+    def on_pre_enter(self, *args):
+        # Settings belong to the open patient profile, which may have changed
+        self.load_settings()
+        self.sound_enabled = self.settings["sound"]
+        self.vibration_enabled = self.settings["vibration"]
+        for key, switch in self.switch_refs.items():
+            switch.active = self.settings[key]
+        self.grace_input.text = str(self.settings["missed_grace_minutes"])
+
     # === Toggle Handlers ===
     def toggle_sound(self, instance, value):
         self.settings["sound"] = value
@@ -179,6 +242,22 @@ class SettingsScreen(MDScreen):
         self.save_settings()
         print("🔔 Notifications Enabled:", value)
 
+    def on_grace_focus(self, instance, focused):
+        if not focused:
+            self.set_missed_grace(instance)
+
+    def set_missed_grace(self, instance):
+        try:
+            minutes = max(int(instance.text), 0)
+        except ValueError:
+            instance.text = str(self.settings["missed_grace_minutes"])
+            return
+        instance.text = str(minutes)
+        if minutes != self.settings["missed_grace_minutes"]:
+            self.settings["missed_grace_minutes"] = minutes
+            self.save_settings()
+            print("⏰ Doses marked missed after:", minutes, "minutes")
+
     def toggle_theme(self, instance, value):
         self.settings["dark_mode"] = value
         app = MDApp.get_running_app()
@@ -186,6 +265,139 @@ class SettingsScreen(MDScreen):
         self.save_settings()
         print("🎨 Theme switched to:", app.theme_cls.theme_style)
 
+    # === Import / Export ===
+    def open_import(self):
+        from kivymd.uix.filemanager import MDFileManager
+        if self.file_manager is None:
+            self.file_manager = MDFileManager(
+                exit_manager=lambda *args: self.file_manager.close(),
+                select_path=self.import_file,
+                ext=[".csv", ".ics"]
+            )
+        self.file_manager.show(os.path.expanduser("~"))
+
+    def import_file(self, path):
+        import import_export
+        self.file_manager.close()
+        store = MDApp.get_running_app().store
+        # Parsed and validated on an I/O thread, committed here in one write
+        self.set_busy(True)
+        store.io.load(
+            lambda: import_export.read_file(path, self.report_progress),
+            on_done=self.finish_import,
+            on_error=self.transfer_failed
+        )
+
+    def report_progress(self, fraction):
+        # I/O thread
+        Clock.schedule_once(lambda dt: setattr(self.transfer_progress, "value", fraction * 100))
+
+    def finish_import(self, result):
+        import import_export
+        import_export.apply_import(MDApp.get_running_app().store, result)
+        self.set_busy(False)
+        self.show_result("Import", result.summary())
+        print("📥 Imported", len(result.items), result.kind, "with", result.error_count, "errors")
+
+    def export_data(self):
+        import import_export
+        store = MDApp.get_running_app().store
+        self.set_busy(True)
+        store.io.write(
+            import_export.export_files(store, EXPORT_DIR, self.report_progress),
+            on_done=self.finish_export,
+            on_error=self.transfer_failed
+        )
+
+    def finish_export(self, paths):
+        self.set_busy(False)
+        self.show_result("Export", "Saved to:\n" + "\n".join(paths))
+        print("📤 Exported to", EXPORT_DIR)
+
+    def transfer_failed(self, error):
+        self.set_busy(False)
+        Snackbar(text=f"⚠️ {error}", duration=3).open()
+
+    def set_busy(self, busy):
+        self.import_btn.disabled = busy
+        self.export_btn.disabled = busy
+        self.transfer_progress.value = 0
+        self.transfer_progress.opacity = 1 if busy else 0
+
+    def show_result(self, title, text):
+        if self.result_dialog:
+            self.result_dialog.dismiss()
+        self.result_dialog = MDDialog(
+            title=title,
+            text=text,
+            buttons=[MDFlatButton(text="OK", on_release=lambda x: self.result_dialog.dismiss())]
+        )
+        self.result_dialog.open()
+
+    # === Debug Section ===
+    def on_title_touch(self, instance, touch):
+        if not instance.collide_point(*touch.pos) or self.debug_card is not None:
+            return False
+        self.title_taps += 1
+        if self.title_taps >= DEBUG_TAPS:
+            self.show_debug_card()
+        return False
+
+    def show_debug_card(self):
+        self.debug_card = MDCard(
+            orientation="vertical",
+            padding=dp(20),
+            spacing=dp(10),
+            radius=[dp(15)],
+            elevation=3,
+            size_hint_y=None
+        )
+        self.debug_card.bind(minimum_height=self.debug_card.setter("height"))
+
+        self.debug_card.add_widget(MDLabel(
+            text="Debug",
+            font_style="H6",
+            bold=True,
+            theme_text_color="Custom",
+            text_color=(0.2, 0.3, 0.4, 1),
+            size_hint_y=None,
+            height=dp(30)
+        ))
+
+        self.debug_label = MDLabel(font_style="Caption", size_hint_y=None)
+        self.debug_label.bind(texture_size=lambda inst, size: setattr(inst, "height", size[1]))
+        self.debug_card.add_widget(self.debug_label)
+
+        row = MDBoxLayout(orientation="horizontal", spacing=dp(10), size_hint_y=None, height=dp(40))
+        row.add_widget(MDLabel(text="Profile screen transitions", font_style="Body1", size_hint_x=0.85))
+        profile_switch = MDSwitch(pos_hint={"center_y": 0.5})
+        profile_switch.active = perf_stats.should_profile("*")
+        profile_switch.bind(active=self.toggle_profiling)
+        row.add_widget(profile_switch)
+        self.debug_card.add_widget(row)
+
+        buttons = MDBoxLayout(orientation="horizontal", spacing=dp(10), size_hint_y=None, height=dp(50))
+        buttons.add_widget(MDRaisedButton(text="Refresh", on_release=lambda x: self.refresh_debug()))
+        buttons.add_widget(MDRaisedButton(text="Reset", on_release=lambda x: self.reset_debug()))
+        self.debug_card.add_widget(buttons)
+
+        # Above the spacer and Back button
+        self.content.add_widget(self.debug_card, index=2)
+        self.refresh_debug()
+
+    def refresh_debug(self):
+        self.debug_label.text = perf_stats.summary()
+
+    def reset_debug(self):
+        perf_stats.reset()
+        self.refresh_debug()
+
+    def toggle_profiling(self, instance, value):
+        if value:
+            perf_stats.profile_screens.add("1")
+        else:
+            perf_stats.profile_screens.clear()
+
     def go_back(self, instance=None):
         if hasattr(self.manager.parent, "go_back"):
             self.manager.parent.go_back()
@@ -193,26 +405,17 @@ class SettingsScreen(MDScreen):
     # === Reminder Feedback Methods ===
     def play_reminder_sound(self):
         if self.sound_enabled:
-            sound = SoundLoader.load("reminder.wav")
-            if sound:
-                sound.play()
+            MDApp.get_running_app().alerts.play_sound()
 
     def vibrate_reminder(self):
         if self.vibration_enabled:
-            try:
-                vibrator.vibrate(time=0.5)
-            except:
-                print("⚠️ Vibration not supported on this platform.")
+            MDApp.get_running_app().alerts.vibrate()
 
     # === Settings Persistence ===
     def load_settings(self):
-        if os.path.exists(SETTINGS_FILE):
-            try:
-                with open(SETTINGS_FILE, "r") as f:
-                    self.settings.update(json.load(f))
-            except:
-                pass
+        self.settings = MDApp.get_running_app().store.settings()
 
     def save_settings(self):
-        with open(SETTINGS_FILE, "w") as f:
-            json.dump(self.settings, f, indent=4)
+        store = MDApp.get_running_app().store
+        store.settings().update(self.settings)
+        store.save_settings()
@@ -0,0 +1,279 @@
+import json
+import os
+import sqlite3
+import sys
+
+from store import DATA_DIR, DEFAULT_SETTINGS, JsonBackend
+from tracker_index import TrackerHistory, TrackerIndex
+from timeutil import from_epoch_minutes, reminder_minutes, time_key
+
+DB_NAME = "medicine_reminder.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS reminders (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    medicine TEXT NOT NULL,
+    time TEXT NOT NULL,
+    date TEXT NOT NULL,
+    time_key TEXT,
+    extra TEXT,
+    recurring INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_reminders_date_time ON reminders(date, time_key);
+CREATE INDEX IF NOT EXISTS idx_reminders_medicine ON reminders(medicine);
+CREATE INDEX IF NOT EXISTS idx_reminders_recurring ON reminders(recurring);
+
+CREATE TABLE IF NOT EXISTS doses (
+    date TEXT NOT NULL,
+    dose TEXT NOT NULL,
+    status TEXT NOT NULL,
+    PRIMARY KEY (date, dose)
+);
+
+CREATE TABLE IF NOT EXISTS settings (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+CORE_FIELDS = ("medicine", "time", "date")
+
+
+def _reminder_row(reminder):
+    extra = {k: v for k, v in reminder.items() if k not in CORE_FIELDS}
+    return (
+        reminder.get("medicine", ""),
+        reminder.get("time", ""),
+        reminder.get("date", ""),
+        time_key(reminder.get("time")),
+        json.dumps(extra) if extra else None,
+        1 if "repeat" in reminder else 0,
+    )
+
+
+def _reminder_dict(medicine, time, date, extra):
+    reminder = {"medicine": medicine, "time": time, "date": date}
+    if extra:
+        reminder.update(json.loads(extra))
+    return reminder
+
+
+class SqliteBackend:
+    # Same interface as store.JsonBackend. Reads are served from an in-memory
+    # copy that is dropped when another connection commits (PRAGMA data_version).
+    def __init__(self, data_dir=DATA_DIR, db_name=DB_NAME):
+        self.data_dir = data_dir
+        self.path = os.path.join(data_dir, db_name)
+        self.conn = sqlite3.connect(self.path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self._reminders = None
+        self._ids = []
+        self._by_id = {}
+        self._tracker = None
+        self._months = {}
+        self._settings = None
+        self._data_version = None
+        self.import_json()
+
+    def _check_external_changes(self):
+        version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+        if version != self._data_version:
+            self._data_version = version
+            self._reminders = None
+            self._tracker = None
+            self._months = {}
+            self._settings = None
+
+    # === Migration ===
+    def import_json(self):
+        # One-shot copy of the legacy JSON files; skipped once recorded in meta
+        done = self.conn.execute("SELECT value FROM meta WHERE key = 'json_imported'").fetchone()
+        if done:
+            return False
+
+        legacy = JsonBackend(self.data_dir)
+        with self.conn:
+            self.conn.executemany(
+                "INSERT INTO reminders (medicine, time, date, time_key, extra, recurring) VALUES (?, ?, ?, ?, ?, ?)",
+                [_reminder_row(r) for r in legacy.load_reminders() if isinstance(r, dict)]
+            )
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO doses (date, dose, status) VALUES (?, ?, ?)",
+                list(legacy.load_tracker().items())
+            )
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)",
+                [(k, json.dumps(v)) for k, v in legacy.load_settings().items()]
+            )
+            self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('json_imported', '1')")
+        self._data_version = None
+        return True
+
+    # === Reminders ===
+    def load_reminders(self):
+        self._check_external_changes()
+        if self._reminders is None:
+            rows = self.conn.execute("SELECT id, medicine, time, date, extra FROM reminders ORDER BY id").fetchall()
+            self._ids = [row[0] for row in rows]
+            self._reminders = [_reminder_dict(*row[1:]) for row in rows]
+            self._by_id = dict(zip(self._ids, self._reminders))
+        return self._reminders
+
+    def add_reminder(self, reminder):
+        reminders = self.load_reminders()
+        with self.conn:
+            cur = self.conn.execute(
+                "INSERT INTO reminders (medicine, time, date, time_key, extra, recurring) VALUES (?, ?, ?, ?, ?, ?)",
+                _reminder_row(reminder)
+            )
+        reminders.append(reminder)
+        self._ids.append(cur.lastrowid)
+        self._by_id[cur.lastrowid] = reminder
+
+    def add_reminders(self, reminders):
+        # Bulk import in one transaction
+        start = len(self.load_reminders())
+        with self.conn:
+            self.conn.executemany(
+                "INSERT INTO reminders (medicine, time, date, time_key, extra, recurring) VALUES (?, ?, ?, ?, ?, ?)",
+                [_reminder_row(r) for r in reminders]
+            )
+            rows = self.conn.execute("SELECT id FROM reminders ORDER BY id LIMIT -1 OFFSET ?", (start,)).fetchall()
+        self._reminders.extend(reminders)
+        for (row_id,), reminder in zip(rows, reminders):
+            self._ids.append(row_id)
+            self._by_id[row_id] = reminder
+
+    def update_reminder(self, index, reminder):
+        reminders = self.load_reminders()
+        row_id = self._ids[index]
+        with self.conn:
+            self.conn.execute(
+                "UPDATE reminders SET medicine = ?, time = ?, date = ?, time_key = ?, extra = ?, recurring = ? WHERE id = ?",
+                _reminder_row(reminder) + (row_id,)
+            )
+        reminders[index] = reminder
+        self._by_id[row_id] = reminder
+
+    def delete_reminder(self, index):
+        reminders = self.load_reminders()
+        row_id = self._ids.pop(index)
+        with self.conn:
+            self.conn.execute("DELETE FROM reminders WHERE id = ?", (row_id,))
+        del self._by_id[row_id]
+        return reminders.pop(index)
+
+    def reminders_between(self, start_date, end_date):
+        self.load_reminders()
+        rows = self.conn.execute(
+            "SELECT id FROM reminders WHERE date BETWEEN ? AND ? AND recurring = 0 ORDER BY date, time_key",
+            (start_date, end_date)
+        ).fetchall()
+        return [self._by_id[row[0]] for row in rows]
+
+    def recurring_reminders(self):
+        self.load_reminders()
+        rows = self.conn.execute("SELECT id FROM reminders WHERE recurring = 1 ORDER BY id").fetchall()
+        return [self._by_id[row[0]] for row in rows]
+
+    def next_reminder(self, now_minutes):
+        self.load_reminders()
+        now = from_epoch_minutes(now_minutes)
+        date_str, now_key = now.strftime("%Y-%m-%d"), now.strftime("%H:%M")
+        row = self.conn.execute(
+            "SELECT id FROM reminders "
+            "WHERE recurring = 0 AND time_key IS NOT NULL AND (date > ? OR (date = ? AND time_key > ?)) "
+            "ORDER BY date, time_key LIMIT 1",
+            (date_str, date_str, now_key)
+        ).fetchone()
+        if row is None:
+            return None
+        reminder = self._by_id[row[0]]
+        return reminder, reminder_minutes(reminder)
+
+    def rewrite_reminders(self, indexes):
+        reminders = self.load_reminders()
+        with self.conn:
+            self.conn.executemany(
+                "UPDATE reminders SET medicine = ?, time = ?, date = ?, time_key = ?, extra = ?, recurring = ? WHERE id = ?",
+                [_reminder_row(reminders[i]) + (self._ids[i],) for i in indexes]
+            )
+
+    # === Tracker ===
+    def load_tracker(self):
+        self._check_external_changes()
+        if self._tracker is None:
+            months = [row[0] for row in self.conn.execute("SELECT DISTINCT substr(date, 1, 7) FROM doses")]
+            self._tracker = TrackerHistory(self.load_month, months)
+        return self._tracker
+
+    def load_month(self, month):
+        # One month of the doses table, read through the (date, dose) key
+        index = self._months.get(month)
+        if index is None:
+            index = self._months[month] = TrackerIndex()
+            rows = self.conn.execute(
+                "SELECT date, dose, status FROM doses WHERE date BETWEEN ? AND ?",
+                (f"{month}-01", f"{month}-31")
+            )
+            for date, dose, status in rows:
+                index._put(date, dose, status)
+        return index
+
+    def save_tracker(self, tracker):
+        # Only doses marked since the last save are written
+        changed = []
+        for month in tracker.dirty:
+            index = self.load_month(month)
+            changed.extend((date, dose, index.get(date, dose)) for date, dose in index.dirty)
+            index.dirty.clear()
+        if changed:
+            with self.conn:
+                self.conn.executemany("INSERT OR REPLACE INTO doses (date, dose, status) VALUES (?, ?, ?)", changed)
+        tracker.dirty.clear()
+
+    def compact_tracker(self, keep_from=None):
+        # Rows are already stored one per dose; retention just drops old months
+        if not keep_from:
+            return
+        tracker = self.load_tracker()
+        with self.conn:
+            self.conn.execute("DELETE FROM doses WHERE date < ?", (f"{keep_from}-01",))
+        for month in tracker.months():
+            if month < keep_from:
+                tracker.forget(month)
+                self._months.pop(month, None)
+
+    # === Settings ===
+    def load_settings(self):
+        self._check_external_changes()
+        if self._settings is None:
+            self._settings = dict(DEFAULT_SETTINGS)
+            for key, value in self.conn.execute("SELECT key, value FROM settings"):
+                self._settings[key] = json.loads(value)
+        return self._settings
+
+    def save_settings(self, settings):
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)",
+                [(k, json.dumps(v)) for k, v in settings.items()]
+            )
+        self._settings = settings
+
+    def close(self):
+        self.conn.close()
+
+
+if __name__ == "__main__":
+    # python sqlite_backend.py [data_dir] -- create the database and import the JSON files
+    backend = SqliteBackend(sys.argv[1] if len(sys.argv) > 1 else DATA_DIR)
+    print(f"{len(backend.load_reminders())} reminders, {len(backend.load_tracker())} tracker entries in {backend.path}")
+    backend.close()
@@ -0,0 +1,82 @@
+import json
+import os
+import time
+
+# Set to 1 to write data/startup_report.json, or to a file path to write there
+ENV_VAR = "MEDICINE_REMINDER_STARTUP_REPORT"
+DEFAULT_REPORT = os.path.join("data", "startup_report.json")
+
+# Times are measured from when this module is first imported, which main.py
+# does before anything else
+STARTED = time.perf_counter()
+enabled = bool(os.environ.get(ENV_VAR))
+phases = []
+reported = False
+
+
+def _ms(t):
+    return round((t - STARTED) * 1000, 2)
+
+
+class span:
+    # with span("imports:screens"): ... records when the block started and
+    # how long it took. After the report is written (e.g. a screen built on
+    # first navigation) the timing goes to the log instead.
+    def __init__(self, name):
+        self.name = name
+        self.start = None
+
+    def __enter__(self):
+        if enabled:
+            self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        if self.start is None:
+            return False
+        duration = round((time.perf_counter() - self.start) * 1000, 2)
+        if reported:
+            _log(f"{self.name} took {duration} ms")
+        else:
+            phases.append({"name": self.name, "start_ms": _ms(self.start), "duration_ms": duration})
+        return False
+
+
+def mark(name):
+    # A point in time rather than a block
+    if enabled and not reported:
+        phases.append({"name": name, "start_ms": _ms(time.perf_counter()), "duration_ms": 0})
+
+
+def report():
+    # Called on the first drawn frame; writes the JSON report and one log line
+    global reported
+    if not enabled or reported:
+        return None
+    mark("first_frame")
+    reported = True
+
+    data = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "total_ms": phases[-1]["start_ms"],
+        "phases": phases,
+    }
+    path = os.environ.get(ENV_VAR)
+    if path == "1":
+        path = DEFAULT_REPORT
+    try:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(data, f, indent=4)
+    except OSError as e:
+        _log(f"could not write {path}: {e}")
+
+    _log(f"first frame after {data['total_ms']} ms; " + ", ".join(
+        f"{p['name']}={p['duration_ms']}" for p in phases if p["duration_ms"]
+    ))
+    return data
+
+
+def _log(message):
+    from kivy.logger import Logger
+    Logger.info(f"Startup: {message}")
@@ -0,0 +1,669 @@
+import json
+import os
+import threading
+import time
+import zlib
+from datetime import datetime
+
+import perf_stats
+
+from events import EventSource
+from recurrence import expand, next_occurrence
+from timeutil import MINUTES_PER_DAY, as_minutes, date_string, from_epoch_minutes, reminder_minutes, stamp_reminder
+from tracker_index import TrackerHistory, TrackerIndex, month_of
+from write_behind import WriteBehind
+
+DATA_DIR = "data"
+
+DEFAULT_SETTINGS = {
+    "sound": True,
+    "vibration": True,
+    "notifications": True,
+    "dark_mode": False,
+    # Seconds to gather doses into one alert, and the minimum gap between alerts
+    "digest_window": 30,
+    "alert_interval": 60,
+    # Minutes after its time an unmarked dose is recorded as missed
+    "missed_grace_minutes": 120
+}
+
+BACKENDS = ("json", "sqlite")
+
+# Fold the reminders journal into a fresh snapshot once it grows past this
+JOURNAL_COMPACT_BYTES = 64 * 1024
+
+# Tracker history is kept as one file per month, data/tracker/YYYY-MM.json
+TRACKER_DIR = "tracker"
+
+
+def file_signature(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def atomic_write_json(path, data, indent=4):
+    start = time.perf_counter()
+    raw = json.dumps(data, indent=indent).encode("utf-8")
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(raw)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    perf_stats.record_io("write", path, len(raw), time.perf_counter() - start)
+    return raw
+
+
+def json_snapshot(value):
+    # Deep copy of JSON data, so a background write never sees it change
+    if isinstance(value, dict):
+        return {k: json_snapshot(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [json_snapshot(v) for v in value]
+    return value
+
+
+def apply_journal_record(reminders, record):
+    op = record.get("op")
+    if op == "add":
+        reminders.append(record["reminder"])
+    elif op == "edit":
+        reminders[record["index"]] = record["reminder"]
+    elif op == "delete":
+        reminders.pop(record["index"])
+
+
+def is_compact_json(path):
+    # Files written with indent=None start "{"" rather than "{\n"
+    try:
+        with open(path, "rb") as f:
+            return f.read(2) != b"{\n"
+    except OSError:
+        return True
+
+
+def current_month():
+    return datetime.now().strftime("%Y-%m")
+
+
+def _load_settings(data):
+    settings = dict(DEFAULT_SETTINGS)
+    if isinstance(data, dict):
+        settings.update(data)
+    return settings
+
+
+def _load_tracker(data):
+    # Also converts the flat "{medicine}_{date}" layout of older versions
+    return TrackerIndex.from_json(data)
+
+
+def _load_reminders(data):
+    return data if isinstance(data, list) else []
+
+
+class CachedJsonFile:
+    # Keeps the parsed contents of one JSON file in memory and only re-reads
+    # it when the file's mtime or size differs from what we last saw.
+    # With an IOExecutor, saves are serialized from a snapshot and written
+    # on its write thread; loads may come from a load thread.
+    def __init__(self, path, loader, dumper=None, io=None):
+        self.path = path
+        self.loader = loader
+        self.dumper = dumper
+        self.io = io
+        # None writes the file without whitespace
+        self.indent = 4
+        self.data = None
+        self.signature = None
+        self.lock = threading.RLock()
+        # Background writes not yet finished; the file is ours until they are
+        self.pending = 0
+
+    def stat_signature(self):
+        return file_signature(self.path)
+
+    def get(self):
+        with self.lock:
+            if self.data is None or (not self.pending and self.stat_signature() != self.signature):
+                self.data = self.reload()
+                self.signature = self.stat_signature()
+            return self.data
+
+    def reload(self):
+        return self.loader(self.read())
+
+    def read(self):
+        if not os.path.exists(self.path):
+            return None
+        start = time.perf_counter()
+        raw = b""
+        try:
+            with open(self.path, "rb") as f:
+                raw = f.read()
+            return json.loads(raw)
+        except (OSError, ValueError):
+            return None
+        finally:
+            perf_stats.record_io("read", self.path, len(raw), time.perf_counter() - start)
+
+    def save(self):
+        if self.data is None:
+            return
+        payload = self.dumper(self.data) if self.dumper else self.data
+        if self.io is None:
+            atomic_write_json(self.path, payload, self.indent)
+            self.signature = self.stat_signature()
+        else:
+            snapshot, indent = json_snapshot(payload), self.indent
+            self.queue_write(lambda: atomic_write_json(self.path, snapshot, indent))
+
+    def queue_write(self, func):
+        with self.lock:
+            self.pending += 1
+        self.io.write(func, on_done=self.write_done, on_error=self.write_failed)
+
+    def write_done(self, result=None):
+        with self.lock:
+            self.pending -= 1
+            if not self.pending:
+                self.signature = self.stat_signature()
+
+    def write_failed(self, error):
+        print(f"⚠️ Could not save {self.path}: {error}")
+        self.write_done()
+
+
+class JournaledJsonFile(CachedJsonFile):
+    # The JSON file is a snapshot; each change is appended as one line to a
+    # JSON-lines journal and replayed on load. The journal's first line holds
+    # the CRC of the snapshot it applies to, so a journal left behind by an
+    # interrupted compaction no longer matches and is discarded.
+    def __init__(self, path, loader, journal_path, compact_bytes=JOURNAL_COMPACT_BYTES, io=None):
+        super().__init__(path, loader, io=io)
+        self.journal_path = journal_path
+        self.compact_bytes = compact_bytes
+        self.snapshot_crc = 0
+        self.journal_bytes = 0
+
+    def stat_signature(self):
+        return (file_signature(self.path), file_signature(self.journal_path))
+
+    def read(self):
+        start = time.perf_counter()
+        try:
+            with open(self.path, "rb") as f:
+                raw = f.read()
+        except OSError:
+            raw = b""
+        self.snapshot_crc = zlib.crc32(raw)
+        try:
+            return json.loads(raw) if raw else None
+        except ValueError:
+            return None
+        finally:
+            perf_stats.record_io("read", self.path, len(raw), time.perf_counter() - start)
+
+    def reload(self):
+        data = super().reload()
+        records, torn = self.read_journal()
+        for record in records:
+            try:
+                apply_journal_record(data, record)
+            except (KeyError, IndexError, TypeError):
+                torn = True
+                break
+        if torn:
+            # Don't append after a half-written line; start from a clean snapshot
+            self.data = data
+            self.compact()
+        return data
+
+    def read_journal(self):
+        start = time.perf_counter()
+        try:
+            with open(self.journal_path, "r") as f:
+                lines = f.readlines()
+        except OSError:
+            self.journal_bytes = 0
+            return [], False
+        self.journal_bytes = sum(map(len, lines))
+        perf_stats.record_io("read", self.journal_path, self.journal_bytes, time.perf_counter() - start)
+
+        records = []
+        for i, line in enumerate(lines):
+            try:
+                record = json.loads(line)
+            except ValueError:
+                return records, True
+            if not line.endswith("\n"):
+                return records, True
+            if i == 0:
+                if record.get("op") != "base" or record.get("crc") != self.snapshot_crc:
+                    os.remove(self.journal_path)
+                    self.journal_bytes = 0
+                    return [], False
+                continue
+            records.append(record)
+        return records, False
+
+    def append(self, record):
+        line = json.dumps(record) + "\n"
+        if self.io is None:
+            self.write_line(line)
+        else:
+            self.queue_write(lambda: self.write_line(line))
+
+        self.journal_bytes += len(line)
+        if self.journal_bytes > self.compact_bytes:
+            self.compact()
+        elif self.io is None:
+            self.signature = self.stat_signature()
+
+    def write_line(self, line):
+        start = time.perf_counter()
+        with open(self.journal_path, "a") as f:
+            if f.tell() == 0:
+                f.write(json.dumps({"op": "base", "crc": self.snapshot_crc}) + "\n")
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+        perf_stats.record_io("append", self.journal_path, len(line), time.perf_counter() - start)
+
+    def compact(self):
+        self.journal_bytes = 0
+        if self.io is None:
+            self.write_snapshot(self.data)
+            self.signature = self.stat_signature()
+        else:
+            snapshot = json_snapshot(self.data)
+            self.queue_write(lambda: self.write_snapshot(snapshot))
+
+    def write_snapshot(self, data):
+        raw = atomic_write_json(self.path, data)
+        self.snapshot_crc = zlib.crc32(raw)
+        try:
+            os.remove(self.journal_path)
+        except FileNotFoundError:
+            pass
+
+    def save(self):
+        if self.data is not None:
+            self.compact()
+
+
+class JsonBackend:
+    # Plain files: safe to load from an I/O thread (see ReminderStore.preload)
+    threaded_loads = True
+
+    def __init__(self, data_dir=DATA_DIR, io=None):
+        self.data_dir = data_dir
+        self.io = io
+        self.reminders_file = JournaledJsonFile(
+            os.path.join(data_dir, "reminders.json"),
+            _load_reminders,
+            os.path.join(data_dir, "reminders.journal.jsonl"),
+            io=io
+        )
+        self.tracker_dir = os.path.join(data_dir, TRACKER_DIR)
+        self.tracker_files = {}
+        self.tracker = None
+        # The load thread and the main thread may both ask for the tracker first
+        self.tracker_lock = threading.Lock()
+        self.settings_file = CachedJsonFile(os.path.join(data_dir, "settings.json"), _load_settings, io=io)
+
+    # === Reminders ===
+    def load_reminders(self):
+        return self.reminders_file.get()
+
+    def add_reminder(self, reminder):
+        self.load_reminders().append(reminder)
+        self.reminders_file.append({"op": "add", "reminder": reminder})
+
+    def add_reminders(self, reminders):
+        # Bulk import: one snapshot write instead of a journal line each
+        self.load_reminders().extend(reminders)
+        self.reminders_file.compact()
+
+    def update_reminder(self, index, reminder):
+        self.load_reminders()[index] = reminder
+        self.reminders_file.append({"op": "edit", "index": index, "reminder": reminder})
+
+    def delete_reminder(self, index):
+        removed = self.load_reminders().pop(index)
+        self.reminders_file.append({"op": "delete", "index": index})
+        return removed
+
+    def reminders_between(self, start_date, end_date):
+        # One-off reminders dated start_date..end_date (inclusive), in time order
+        found = [
+            r for r in self.load_reminders()
+            if "repeat" not in r and start_date <= r.get("date", "") <= end_date
+        ]
+        return sorted(found, key=lambda r: reminder_minutes(r) or 0)
+
+    def recurring_reminders(self):
+        return [r for r in self.load_reminders() if "repeat" in r]
+
+    def next_reminder(self, now_minutes):
+        best = None
+        for r in self.load_reminders():
+            if "repeat" in r:
+                continue
+            at = reminder_minutes(r)
+            if at is not None and at > now_minutes and (best is None or at < best[1]):
+                best = (r, at)
+        return best
+
+    def rewrite_reminders(self, indexes):
+        self.reminders_file.save()
+
+    # === Tracker ===
+    def load_tracker(self):
+        with self.tracker_lock:
+            if self.tracker is None:
+                self.migrate_tracker()
+                self.tracker = TrackerHistory(self.load_month, self.tracker_months())
+            return self.tracker
+
+    def month_file(self, month):
+        month_file = self.tracker_files.get(month)
+        if month_file is None:
+            month_file = CachedJsonFile(
+                os.path.join(self.tracker_dir, f"{month}.json"), _load_tracker, TrackerIndex.to_json, io=self.io
+            )
+            self.tracker_files[month] = month_file
+        return month_file
+
+    def load_month(self, month):
+        return self.month_file(month).get()
+
+    def tracker_months(self):
+        try:
+            names = os.listdir(self.tracker_dir)
+        except FileNotFoundError:
+            return []
+        return [name[:-len(".json")] for name in names if name.endswith(".json")]
+
+    def save_tracker(self, tracker):
+        # Rewrites only the months that were marked in; closed months are
+        # written compactly since they are rarely read again
+        os.makedirs(self.tracker_dir, exist_ok=True)
+        current = current_month()
+        for month in tracker.dirty:
+            month_file = self.month_file(month)
+            month_file.indent = 4 if month >= current else None
+            month_file.save()
+            month_file.data.dirty.clear()
+        tracker.dirty.clear()
+
+    def migrate_tracker(self):
+        # Splits the single tracker.json of older versions into month files
+        legacy = CachedJsonFile(os.path.join(self.data_dir, "tracker.json"), _load_tracker)
+        if not os.path.exists(legacy.path):
+            return
+        os.makedirs(self.tracker_dir, exist_ok=True)
+        months = {}
+        for date, dose, status in legacy.get().items():
+            index = months.get(month_of(date))
+            if index is None:
+                index = months[month_of(date)] = self.load_month(month_of(date))
+            index._put(date, dose, status)
+        # Written here rather than queued: tracker.json is only removed once
+        # every month file is on disk
+        current = current_month()
+        for month, index in months.items():
+            month_file = self.month_file(month)
+            month_file.indent = 4 if month >= current else None
+            atomic_write_json(month_file.path, TrackerIndex.to_json(index), month_file.indent)
+            month_file.signature = month_file.stat_signature()
+        os.remove(legacy.path)
+
+    def compact_tracker(self, keep_from=None):
+        # Deletes month files older than keep_from and rewrites closed months
+        # that still carry indentation; compact files are not opened at all
+        tracker = self.load_tracker()
+        current = current_month()
+        for month in tracker.months():
+            month_file = self.month_file(month)
+            if keep_from and month < keep_from:
+                self.drop_month(tracker, month)
+            elif month < current and not is_compact_json(month_file.path):
+                if len(month_file.get()):
+                    month_file.indent = None
+                    month_file.save()
+                else:
+                    self.drop_month(tracker, month)
+
+    def drop_month(self, tracker, month):
+        try:
+            os.remove(self.tracker_files.pop(month).path)
+        except FileNotFoundError:
+            pass
+        tracker.forget(month)
+
+    # === Settings ===
+    def load_settings(self):
+        return self.settings_file.get()
+
+    def save_settings(self, settings):
+        self.settings_file.data = settings
+        self.settings_file.save()
+
+    def close(self):
+        pass
+
+
+def open_backend(name="json", data_dir=DATA_DIR, io=None):
+    if name == "sqlite":
+        from sqlite_backend import SqliteBackend
+        return SqliteBackend(data_dir)
+    if name != "json":
+        raise ValueError(f"Unknown storage backend: {name!r} (expected one of {BACKENDS})")
+    return JsonBackend(data_dir, io)
+
+
+class ReminderStore(EventSource):
+    # Listeners bound here get callback(event, **details) with event one of
+    # "add", "edit", "delete", "status", "settings", "profile", "import"
+    def __init__(self, data_dir=DATA_DIR, backend="json", schedule=None, history_months=0, io=None):
+        super().__init__()
+        # io: an IOExecutor to load and save off the UI thread; without one
+        # everything is read here and written synchronously
+        self.data_dir = data_dir
+        self.io = io
+        self.backend_name = backend
+        self.backend = open_backend(backend, data_dir, io)
+        # Months of tracker history to keep, counting the current one; 0 keeps all
+        self.history_months = history_months
+        # Tracker and settings saves are batched; reminder edits go straight to the journal
+        self.writer = WriteBehind(schedule)
+        self.loaded = False
+        self.loading = False
+        self.waiting = []
+        if io is None:
+            self.load()
+            self.loaded = True
+
+    # === Loading ===
+    def load(self):
+        # Parses the data files and runs the one-off upgrades
+        self.backfill_timestamps()
+        self.compact_history()
+        self.settings()
+        self.day_counts(datetime.now().strftime("%Y-%m-%d"))
+
+    def preload(self):
+        # Starts the load on an I/O thread; see when_loaded
+        if self.loaded or self.loading:
+            return
+        if self.io is None or not getattr(self.backend, "threaded_loads", False):
+            self.load()
+            self.finish_loading()
+            return
+        self.loading = True
+        self.io.load(self.load, on_done=self.finish_loading, on_error=self.load_failed)
+
+    def finish_loading(self, result=None):
+        self.loading = False
+        self.loaded = True
+        waiting, self.waiting = self.waiting, []
+        for callback in waiting:
+            callback()
+
+    def load_failed(self, error):
+        print("⚠️ Background load failed, loading on the main thread:", error)
+        self.load()
+        self.finish_loading()
+
+    def switch_data_dir(self, data_dir):
+        # Saves and closes the open data, then loads data_dir in its place
+        # (a patient profile, see profiles.py); listeners get "profile" once
+        # it is in memory and should re-read everything
+        self.flush(wait=True)
+        self.backend.close()
+        self.data_dir = data_dir
+        self.backend = open_backend(self.backend_name, data_dir, self.io)
+        self.loaded = False
+        self.loading = False
+        self.when_loaded(lambda: self.dispatch("profile"))
+
+    def when_loaded(self, callback):
+        # Runs callback() on the main thread once the data is in memory
+        if self.loaded:
+            callback()
+        else:
+            self.waiting.append(callback)
+            self.preload()
+
+    # === Reminders ===
+    def reminders(self):
+        return self.backend.load_reminders()
+
+    def get_reminder(self, index):
+        reminders = self.reminders()
+        if index is not None and 0 <= index < len(reminders):
+            return reminders[index]
+        return None
+
+    def backfill_timestamps(self):
+        # Older entries lack the "at" timestamp and may use "2:00 PM" as well as
+        # "09:10 PM"; normalize them once so later reads never parse text.
+        changed = [i for i, r in enumerate(self.reminders()) if stamp_reminder(r)]
+        if changed:
+            self.backend.rewrite_reminders(changed)
+        return len(changed)
+
+    def add_reminder(self, reminder):
+        stamp_reminder(reminder)
+        self.backend.add_reminder(reminder)
+        self.dispatch("add", index=len(self.reminders()) - 1, reminder=reminder)
+
+    def add_reminders(self, reminders):
+        # Bulk import (import_export.py): one backend write, one "import" event
+        for reminder in reminders:
+            stamp_reminder(reminder)
+        self.backend.add_reminders(reminders)
+        self.dispatch("import", reminders=len(reminders))
+
+    def update_reminder(self, index, reminder):
+        # reminder should be a new dict; listeners get the replaced one as previous
+        previous = self.get_reminder(index)
+        stamp_reminder(reminder)
+        self.backend.update_reminder(index, reminder)
+        self.dispatch("edit", index=index, reminder=reminder, previous=previous)
+
+    def delete_reminder(self, index):
+        removed = self.backend.delete_reminder(index)
+        self.dispatch("delete", index=index, reminder=removed)
+        return removed
+
+    def occurrences(self, start, end):
+        # Doses in [start, end) (datetimes or epoch minutes), in time order.
+        # Recurring rules are expanded for this window only, so the cost
+        # follows the window, not the course length.
+        start, end = as_minutes(start), as_minutes(end)
+        one_offs = self.backend.reminders_between(
+            date_string(start // MINUTES_PER_DAY), date_string((end - 1) // MINUTES_PER_DAY)
+        )
+        return expand(one_offs + self.backend.recurring_reminders(), start, end)
+
+    def occurrences_on(self, day):
+        # day: a date
+        start = as_minutes(datetime.combine(day, datetime.min.time()))
+        return list(self.occurrences(start, start + MINUTES_PER_DAY))
+
+    def next_reminder(self, now):
+        # (reminder, datetime) of the earliest dose strictly after now
+        now_minutes = as_minutes(now)
+        best = self.backend.next_reminder(now_minutes)
+        for reminder in self.backend.recurring_reminders():
+            at = next_occurrence(reminder, now_minutes)
+            if at is not None and (best is None or at < best[1]):
+                best = (reminder, at)
+        return (best[0], from_epoch_minutes(best[1])) if best else None
+
+    # === Tracker ===
+    def tracker(self):
+        return self.backend.load_tracker()
+
+    def get_status(self, date, dose):
+        return self.tracker().get(date, dose)
+
+    def set_status(self, date, dose, status):
+        tracker = self.tracker()
+        previous = tracker.set(date, dose, status)
+        self.writer.mark_dirty("tracker", lambda: self.backend.save_tracker(tracker))
+        self.dispatch("status", date=date, dose=dose, status=status, previous=previous)
+
+    def set_statuses(self, entries):
+        # Bulk import of (date, dose, status); saved with one batched write
+        tracker = self.tracker()
+        for date, dose, status in entries:
+            tracker.set(date, dose, status)
+        self.writer.mark_dirty("tracker", lambda: self.backend.save_tracker(tracker))
+        self.dispatch("import", statuses=len(entries))
+
+    def day_counts(self, date):
+        # (taken, missed) for one day, from counters kept up to date on every mark
+        return self.tracker().day_counts(date)
+
+    def compact_history(self):
+        # Applies the retention window and compacts closed months
+        keep_from = None
+        if self.history_months > 0:
+            now = datetime.now()
+            first = now.year * 12 + now.month - self.history_months
+            keep_from = f"{first // 12:04d}-{first % 12 + 1:02d}"
+        self.flush()
+        self.backend.compact_tracker(keep_from)
+        return keep_from
+
+    # === Settings ===
+    def settings(self):
+        return self.backend.load_settings()
+
+    def save_settings(self):
+        settings = self.settings()
+        self.writer.mark_dirty("settings", lambda: self.backend.save_settings(settings))
+        self.dispatch("settings")
+
+    # === Persistence ===
+    def flush(self, wait=False):
+        # wait=True also blocks until queued background writes are on disk
+        self.writer.flush()
+        if wait and self.io is not None:
+            self.io.wait_writes()
+
+    @property
+    def flush_count(self):
+        return self.writer.flush_count
+
+    def close(self):
+        self.flush()
+        if self.io is not None:
+            self.io.shutdown()
+        self.backend.close()
@@ -0,0 +1,106 @@
+from datetime import datetime, timedelta
+from functools import lru_cache
+
+# Reminder times are handled as whole minutes since 1970-01-01 00:00 local
+# time ("epoch minutes"), so hot loops compare ints instead of parsing text.
+EPOCH = datetime(1970, 1, 1)
+MINUTES_PER_DAY = 24 * 60
+
+
+@lru_cache(maxsize=4096)
+def parse_time(time_str):
+    # "2:00 PM", "02:00 pm", "2:00PM" -> minutes after midnight, None if invalid
+    if not isinstance(time_str, str):
+        return None
+    text = time_str.strip().upper()
+    meridiem = text[-2:]
+    if meridiem not in ("AM", "PM"):
+        return None
+    hours, sep, minutes = text[:-2].strip().partition(":")
+    if not sep or not hours.isdigit() or not minutes.isdigit() or len(minutes) != 2:
+        return None
+    h, m = int(hours), int(minutes)
+    if not (1 <= h <= 12 and 0 <= m < 60):
+        return None
+    return (h % 12 + (12 if meridiem == "PM" else 0)) * 60 + m
+
+
+@lru_cache(maxsize=4096)
+def parse_date(date_str):
+    # "YYYY-MM-DD" -> days since the epoch, None if invalid
+    try:
+        return (datetime.strptime(date_str, "%Y-%m-%d") - EPOCH).days
+    except (TypeError, ValueError):
+        return None
+
+
+@lru_cache(maxsize=4096)
+def date_string(day):
+    return (EPOCH + timedelta(days=day)).strftime("%Y-%m-%d")
+
+
+def format_time(minute_of_day):
+    h, m = divmod(minute_of_day, 60)
+    return f"{(h % 12) or 12:02d}:{m:02d} {'AM' if h < 12 else 'PM'}"
+
+
+def normalize_time(time_str):
+    # Canonical "%I:%M %p" text, e.g. "2:00 pm" -> "02:00 PM"
+    minutes = parse_time(time_str)
+    return format_time(minutes) if minutes is not None else None
+
+
+def time_key(time_str):
+    # "2:00 PM" / "02:00 PM" -> "14:00", so times sort and compare as text
+    minutes = parse_time(time_str)
+    if minutes is None:
+        return None
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def epoch_minutes(dt):
+    return (dt - EPOCH) // timedelta(minutes=1)
+
+
+def from_epoch_minutes(minutes):
+    return EPOCH + timedelta(minutes=minutes)
+
+
+def as_minutes(value):
+    return value if isinstance(value, int) else epoch_minutes(value)
+
+
+def weekday(day):
+    # 1970-01-01 was a Thursday; Monday = 0 like datetime.weekday()
+    return (day + 3) % 7
+
+
+def reminder_minutes(reminder):
+    at = reminder.get("at")
+    if isinstance(at, int):
+        return at
+    day = parse_date(reminder.get("date"))
+    minutes = parse_time(reminder.get("time"))
+    if day is None or minutes is None:
+        return None
+    return day * MINUTES_PER_DAY + minutes
+
+
+def reminder_datetime(reminder):
+    at = reminder_minutes(reminder)
+    return from_epoch_minutes(at) if at is not None else None
+
+
+def stamp_reminder(reminder):
+    # Normalizes the time text and stores the epoch-minute timestamp.
+    # Returns True if the reminder changed.
+    time_str = normalize_time(reminder.get("time"))
+    day = parse_date(reminder.get("date"))
+    if time_str is None or day is None:
+        return False
+    at = day * MINUTES_PER_DAY + parse_time(time_str)
+    if reminder.get("time") == time_str and reminder.get("at") == at:
+        return False
+    reminder["time"] = time_str
+    reminder["at"] = at
+    return True
@@ -1,6 +1,4 @@
-import json
-import os
-from datetime import datetime, timedelta
+from datetime import datetime
 from kivymd.uix.screen import MDScreen
 from kivymd.uix.boxlayout import MDBoxLayout
 from kivymd.uix.label import MDLabel
@@ -12,34 +10,41 @@ from kivy.metrics import dp
 from kivy.app import App
 from kivymd.app import MDApp
 from kivy.graphics import Color, Rectangle
-
-REMINDERS_FILE = os.path.join("data", "reminders.json")
-TRACK_FILE = os.path.join("data", "tracker.json")
+from kivy.clock import Clock
+from timeutil import MINUTES_PER_DAY, epoch_minutes
 
 class TrackerScreen(MDScreen):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.built = False
+        # Row id -> (row, divider); rows are kept between visits and patched
+        self.rows = {}
+        self.row_order = []
+        # Marks made elsewhere (the missed-dose sweeper) redraw once per frame
+        self.refresh_trigger = Clock.create_trigger(lambda dt: self.load_reminders())
+
     def on_pre_enter(self):
-        self.clear_widgets()
-        self.build_ui()
+        if not self.built:
+            self.build_ui()
+            App.get_running_app().store.bind(self.on_store_changed)
+            self.built = True
+        self.apply_theme()
+        # Rows already on screen stay until the data is loaded
+        App.get_running_app().store.when_loaded(self.load_reminders)
 
     def build_ui(self):
-        theme = MDApp.get_running_app().theme_cls.theme_style
-        taken_bg = (0.8, 1, 0.8, 1) if theme == "Light" else (0.2, 0.4, 0.2, 1)
-        missed_bg = (1, 0.8, 0.8, 1) if theme == "Light" else (0.4, 0.2, 0.2, 1)
-
         main = MDBoxLayout(orientation="vertical", padding=dp(20), spacing=dp(20))
 
         # === TRACKER PAGE HEADING ===
-        heading_color = (1, 1, 1, 1) if theme == "Dark" else (0, 0, 0, 1)
-        heading_label = MDLabel(
+        self.heading_label = MDLabel(
             text="Tracker Page",
             halign="center",
             font_style="H5",
             theme_text_color="Custom",
-            text_color=heading_color,
             size_hint_y=None,
             height=dp(40)
         )
-        main.add_widget(heading_label)
+        main.add_widget(self.heading_label)
 
         summary_box = MDBoxLayout(size_hint_y=None, height=dp(120), spacing=dp(20))
 
@@ -47,7 +52,6 @@ class TrackerScreen(MDScreen):
             orientation="vertical",
             padding=dp(15),
             radius=[dp(15)],
-            md_bg_color=taken_bg,
             elevation=5
         )
         self.taken_label = MDLabel(text="0", halign="center", font_style="H4", theme_text_color="Primary")
@@ -58,7 +62,6 @@ class TrackerScreen(MDScreen):
             orientation="vertical",
             padding=dp(15),
             radius=[dp(15)],
-            md_bg_color=missed_bg,
             elevation=5
         )
         self.missed_label = MDLabel(text="0", halign="center", font_style="H4", theme_text_color="Primary")
@@ -68,9 +71,7 @@ class TrackerScreen(MDScreen):
         summary_box.add_widget(self.taken_card)
         summary_box.add_widget(self.missed_card)
 
-        today_str = datetime.now().strftime("%Y-%m-%d")
-        date_label = MDLabel(
-            text=f"{today_str}",
+        self.date_label = MDLabel(
             halign="center",
             font_style="H6",
             bold=True,
@@ -91,174 +92,154 @@ class TrackerScreen(MDScreen):
             height=dp(70),
             padding=[0, dp(10), 0, dp(10)]
         )
+        button_row = MDBoxLayout(orientation="horizontal", spacing=dp(20), size_hint=(None, None), size=(dp(220), dp(50)))
+        stats_btn = MDRaisedButton(
+            text="Stats",
+            on_release=lambda x: self.open_stats(),
+            size_hint=(None, None),
+            size=(dp(100), dp(50))
+        )
         back_btn = MDRaisedButton(
             text="Back",
             on_release=lambda x: self.go_back(),
             size_hint=(None, None),
             size=(dp(100), dp(50))
         )
-        back_container.add_widget(back_btn)
+        button_row.add_widget(stats_btn)
+        button_row.add_widget(back_btn)
+        back_container.add_widget(button_row)
 
         main.add_widget(summary_box)
-        main.add_widget(date_label)
+        main.add_widget(self.date_label)
         main.add_widget(scroll)
         main.add_widget(back_container)
 
         self.add_widget(main)
 
-        self.load_tracker_counts()
-        self.load_reminders()
+    def apply_theme(self):
+        theme = MDApp.get_running_app().theme_cls.theme_style
+        self.taken_card.md_bg_color = (0.8, 1, 0.8, 1) if theme == "Light" else (0.2, 0.4, 0.2, 1)
+        self.missed_card.md_bg_color = (1, 0.8, 0.8, 1) if theme == "Light" else (0.4, 0.2, 0.2, 1)
+        self.heading_label.text_color = (1, 1, 1, 1) if theme == "Dark" else (0, 0, 0, 1)
 
     def load_reminders(self):
-        today = datetime.now().strftime("%Y-%m-%d")
         now = datetime.now()
-        reminders = []
-
-        if os.path.exists(REMINDERS_FILE):
-            with open(REMINDERS_FILE, "r") as f:
-                try:
-                    reminders = json.load(f)
-                except json.JSONDecodeError:
-                    reminders = []
-
-        self.list_box.clear_widgets()
-
-        for r in reminders:
-            med_name = r.get("medicine", "Unknown")
-            time_str = r.get("time", "00:00 AM")
-            date_str = r.get("date", today)
-
-            try:
-                reminder_time = datetime.strptime(f"{date_str} {time_str}", "%Y-%m-%d %I:%M %p")
-            except:
-                continue
-
-            key = f"{med_name}_{date_str}"
-
-            if date_str < today:
-                if not self.was_marked(med_name, date_str):
-                    self.tracker_data[key] = "missed"
-                continue
-
-            if date_str == today and reminder_time + timedelta(hours=2) < datetime.now():
-                if not self.was_marked(med_name, date_str):
-                    self.tracker_data[key] = "missed"
-
-            self.add_medicine_item(med_name, date_str, reminder_time)
+        now_minutes = epoch_minutes(now)
+        today = now_minutes - now_minutes % MINUTES_PER_DAY
+        store = App.get_running_app().store
+        self.date_label.text = now.strftime("%Y-%m-%d")
 
-        self.save_tracker_counts()
+        # Overdue doses are marked missed by the app's MissedDoseSweeper
+        self.sync_rows(list(store.occurrences(today, today + MINUTES_PER_DAY)))
+        self.load_tracker_counts()
         self.update_summary_ui()
 
-    def add_medicine_item(self, medicine_name, date_str, reminder_time):
-        key = f"{medicine_name}_{date_str}"
-        row = MDBoxLayout(orientation="horizontal", spacing=dp(10), padding=dp(10), size_hint_y=None, height=dp(60))
+    def on_store_changed(self, event, **details):
+        if event in ("status", "import", "profile") and self.manager and self.manager.current == self.name:
+            self.refresh_trigger()
+
+    def sync_rows(self, doses):
+        # Diff today's doses against the rows already on screen: only new doses
+        # get widgets, only rows whose status changed are redrawn, and rows for
+        # doses that went away (edits, deletes, a new day) are dropped.
+        store = App.get_running_app().store
+        wanted = []
+        for occ in doses:
+            row_id = occ.notification_key
+            while row_id in wanted:
+                row_id += "+"
+            wanted.append(row_id)
+
+            state = store.get_status(*occ.tracker_key) or "pending"
+            if row_id in self.rows:
+                row = self.rows[row_id][0]
+                if row.dose_state != state:
+                    self.render_row(row, occ.medicine, occ.tracker_key, state)
+            else:
+                row = MDBoxLayout(orientation="horizontal", spacing=dp(10), padding=dp(10), size_hint_y=None, height=dp(60))
+                self.render_row(row, occ.medicine, occ.tracker_key, state)
+                self.rows[row_id] = (row, self.make_divider())
+
+        for row_id in set(self.rows) - set(wanted):
+            row, divider = self.rows.pop(row_id)
+            self.list_box.remove_widget(row)
+            self.list_box.remove_widget(divider)
+
+        if wanted != self.row_order:
+            # Re-attach the (mostly existing) widgets in the new order
+            self.list_box.clear_widgets()
+            for row_id in wanted:
+                row, divider = self.rows[row_id]
+                self.list_box.add_widget(row)
+                self.list_box.add_widget(divider)
+            self.row_order = wanted
+
+    def render_row(self, row, medicine_name, key, state):
+        row.dose_state = state
+        row.clear_widgets()
         row.add_widget(MDLabel(text=medicine_name, halign="left", theme_text_color="Primary"))
 
-        if self.was_marked(medicine_name, date_str):
-            status = self.tracker_data[key]
+        if state != "pending":
             status_label = MDLabel(
-                text=f"Marked as {status.capitalize()}",
+                text=f"Marked as {state.capitalize()}",
                 halign="right",
                 theme_text_color="Custom",
-                text_color=("#4CAF50" if status == "taken" else "#E53935")
+                text_color=("#4CAF50" if state == "taken" else "#E53935")
             )
             row.add_widget(status_label)
         else:
-            now = datetime.now()
-            if reminder_time + timedelta(hours=2) < now:
-                self.tracker_data[key] = "missed"
-                status_label = MDLabel(
-                    text="Marked as Missed",
-                    halign="right",
-                    theme_text_color="Custom",
-                    text_color="#E53935"
-                )
-                row.add_widget(status_label)
-            else:
-                taken_btn = MDRaisedButton(
-                    text="Taken",
-                    md_bg_color="#4CAF50",
-                    on_release=lambda x: self.mark_and_replace(row, medicine_name, date_str, "taken")
-                )
-                missed_btn = MDRaisedButton(
-                    text="Missed",
-                    md_bg_color="#E53935",
-                    on_release=lambda x: self.mark_and_replace(row, medicine_name, date_str, "missed")
-                )
-                row.add_widget(taken_btn)
-                row.add_widget(missed_btn)
-
-        self.list_box.add_widget(row)
+            taken_btn = MDRaisedButton(
+                text="Taken",
+                md_bg_color="#4CAF50",
+                on_release=lambda x: self.mark_and_replace(row, medicine_name, key, "taken")
+            )
+            missed_btn = MDRaisedButton(
+                text="Missed",
+                md_bg_color="#E53935",
+                on_release=lambda x: self.mark_and_replace(row, medicine_name, key, "missed")
+            )
+            row.add_widget(taken_btn)
+            row.add_widget(missed_btn)
 
+    def make_divider(self):
         # === Divider Line ===
         divider = MDBoxLayout(size_hint_y=None, height=1)
         with divider.canvas.before:
             Color(0.7, 0.7, 0.7, 1)
             divider.rect = Rectangle()
         divider.bind(pos=self.update_divider, size=self.update_divider)
-        self.list_box.add_widget(divider)
+        return divider
 
     def update_divider(self, instance, value):
         instance.rect.pos = instance.pos
         instance.rect.size = instance.size
 
-    def mark_and_replace(self, row, medicine_name, date_str, status):
-        key = f"{medicine_name}_{date_str}"
-        if key in self.tracker_data:
+    def mark_and_replace(self, row, medicine_name, key, status):
+        if self.was_marked(key):
             return
 
-        self.tracker_data[key] = status
-        if status == "taken":
-            self.taken_count += 1
-        else:
-            self.missed_count += 1
-
-        self.save_tracker_counts()
+        self.set_status(key, status)
+        self.load_tracker_counts()
         self.update_summary_ui()
-
-        row.clear_widgets()
-        row.add_widget(MDLabel(text=medicine_name, halign="left", theme_text_color="Primary"))
-        status_label = MDLabel(
-            text=f"Marked as {status.capitalize()}",
-            halign="right",
-            theme_text_color="Custom",
-            text_color=("#4CAF50" if status == "taken" else "#E53935")
-        )
-        row.add_widget(status_label)
+        self.render_row(row, medicine_name, key, status)
 
     def load_tracker_counts(self):
-        self.taken_count = 0
-        self.missed_count = 0
-        self.tracker_data = {}
-
-        if os.path.exists(TRACK_FILE):
-            with open(TRACK_FILE, "r") as f:
-                try:
-                    self.tracker_data = json.load(f)
-                except:
-                    self.tracker_data = {}
-
+        # Per-day counters are kept by the tracker index, no history scan
         today = datetime.now().strftime("%Y-%m-%d")
-        for key, status in self.tracker_data.items():
-            if key.endswith(today):
-                if status == "taken":
-                    self.taken_count += 1
-                elif status == "missed":
-                    self.missed_count += 1
-
-    def save_tracker_counts(self):
-        # Remove previous summary keys to avoid duplication
-        self.tracker_data = {k: v for k, v in self.tracker_data.items() if k not in ["taken", "missed"]}
-        with open(TRACK_FILE, "w") as f:
-            json.dump(self.tracker_data, f, indent=4)
+        self.taken_count, self.missed_count = App.get_running_app().store.day_counts(today)
+
+    def set_status(self, key, status):
+        App.get_running_app().store.set_status(*key, status)
 
     def update_summary_ui(self):
         self.taken_label.text = str(self.taken_count)
         self.missed_label.text = str(self.missed_count)
 
-    def was_marked(self, medicine_name, date_str):
-        key = f"{medicine_name}_{date_str}"
-        return key in self.tracker_data
+    def was_marked(self, key):
+        return App.get_running_app().store.get_status(*key) is not None
+
+    def open_stats(self):
+        App.get_running_app().root.switch("adherence")
 
     def go_back(self):
         App.get_running_app().root.go_back()
\ No newline at end of file
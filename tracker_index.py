@@ -0,0 +1,142 @@
+import re
+
+STATUSES = ("taken", "missed")
+DATE_IN_KEY = re.compile(r"_(\d{4}-\d{2}-\d{2})(?=_|$)")
+
+
+def split_tracker_key(key):
+    # Legacy flat keys: "{medicine}_{date}" or "{medicine}_{date}_{time}".
+    # Returns (date, dose) where dose is the key without its date part.
+    match = DATE_IN_KEY.search(key)
+    if not match:
+        return None
+    return match.group(1), key[:match.start()] + key[match.end():]
+
+
+class TrackerIndex:
+    # Tracker statuses partitioned by date, {date: {dose: status}}, with a
+    # taken/missed counter per day that is adjusted on every mark, so a day's
+    # summary never depends on how much history is stored.
+    def __init__(self):
+        self.days = {}
+        self.counts = {}
+        # (date, dose) pairs changed since the backend last saved them
+        self.dirty = set()
+
+    @classmethod
+    def from_json(cls, data):
+        index = cls()
+        if not isinstance(data, dict):
+            return index
+        for key, value in data.items():
+            if isinstance(value, dict):
+                for dose, status in value.items():
+                    index._put(key, dose, status)
+            elif key not in STATUSES:
+                # Flat "{medicine}_{date}" entries from older versions
+                split = split_tracker_key(key)
+                if split:
+                    index._put(split[0], split[1], value)
+        return index
+
+    def to_json(self):
+        return self.days
+
+    def _put(self, date, dose, status):
+        doses = self.days.setdefault(date, {})
+        counts = self.counts.setdefault(date, dict.fromkeys(STATUSES, 0))
+        previous = doses.get(dose)
+        if previous in counts:
+            counts[previous] -= 1
+        doses[dose] = status
+        if status in counts:
+            counts[status] += 1
+        return previous
+
+    def set(self, date, dose, status):
+        self.dirty.add((date, dose))
+        return self._put(date, dose, status)
+
+    def get(self, date, dose):
+        return self.days.get(date, {}).get(dose)
+
+    def day(self, date):
+        return self.days.get(date, {})
+
+    def day_counts(self, date):
+        counts = self.counts.get(date)
+        if not counts:
+            return 0, 0
+        return counts["taken"], counts["missed"]
+
+    def items(self):
+        for date, doses in self.days.items():
+            for dose, status in doses.items():
+                yield date, dose, status
+
+    def __len__(self):
+        return sum(len(doses) for doses in self.days.values())
+
+
+def month_of(date):
+    # "2025-11-04" -> "2025-11", the partition a day's statuses live in
+    return date[:7]
+
+
+class TrackerHistory:
+    # The full tracker history as one TrackerIndex per month. Partitions come
+    # from load_month(month), which the backend serves from its own cache, so
+    # only months that are actually looked at are ever read; marking a dose
+    # touches the current month alone.
+    def __init__(self, load_month, months=()):
+        self.load_month = load_month
+        # Months with stored data, oldest first when sorted
+        self.known = set(months)
+        # Months with marks the backend has not saved yet
+        self.dirty = set()
+
+    def partition(self, month):
+        return self.load_month(month)
+
+    def set(self, date, dose, status):
+        month = month_of(date)
+        self.known.add(month)
+        self.dirty.add(month)
+        return self.partition(month).set(date, dose, status)
+
+    def get(self, date, dose):
+        month = month_of(date)
+        if month not in self.known:
+            return None
+        return self.partition(month).get(date, dose)
+
+    def day(self, date):
+        month = month_of(date)
+        if month not in self.known:
+            return {}
+        return self.partition(month).day(date)
+
+    def day_counts(self, date):
+        month = month_of(date)
+        if month not in self.known:
+            return 0, 0
+        return self.partition(month).day_counts(date)
+
+    def months(self):
+        return sorted(self.known)
+
+    def forget(self, month):
+        self.known.discard(month)
+        self.dirty.discard(month)
+
+    def items(self):
+        for month in self.months():
+            yield from self.partition(month).items()
+
+    def day_items(self):
+        # (date, {dose: status}) for every stored day, in month order
+        for month in self.months():
+            yield from self.partition(month).days.items()
+
+    def __len__(self):
+        return sum(len(self.partition(month)) for month in self.known)
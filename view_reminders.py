@@ -1,29 +1,86 @@
-import json
-import os
-from datetime import datetime
 from kivymd.uix.screen import MDScreen
 from kivymd.uix.boxlayout import MDBoxLayout
 from kivymd.uix.button import MDRaisedButton, MDFlatButton
 from kivymd.uix.label import MDLabel
 from kivymd.uix.card import MDCard
-from kivymd.uix.scrollview import MDScrollView
 from kivymd.uix.dialog import MDDialog
 from kivy.uix.anchorlayout import AnchorLayout
+from kivy.uix.recycleview import RecycleView
+from kivy.uix.recycleview.views import RecycleDataViewBehavior
+from kivy.uix.recycleboxlayout import RecycleBoxLayout
 from kivy.app import App
+from recurrence import describe_rule
+from timeutil import reminder_minutes
+
+ROW_HEIGHT = 151  # record card + spacing + separator
+
+
+class ReminderRow(RecycleDataViewBehavior, MDBoxLayout):
+    # One recycled list entry; the RecycleView only creates enough of these
+    # to fill the visible area and rebinds them to new data while scrolling.
+    def __init__(self, **kwargs):
+        super().__init__(orientation="vertical", spacing=10, **kwargs)
+        self.screen = None
+        self.reminder_index = None
+
+        record_card = MDCard(
+            padding=10,
+            orientation="vertical",
+            radius=[10],
+            size_hint_y=None,
+            height=140,
+            spacing=10
+        )
+
+        # Medicine name
+        self.medicine_label = MDLabel(
+            halign="center",
+            theme_text_color="Primary",
+            font_style="Subtitle1"
+        )
+        record_card.add_widget(self.medicine_label)
+
+        # Date and time layout
+        datetime_layout = MDBoxLayout(orientation="horizontal", spacing=10, size_hint_y=None, height=30)
+        self.date_label = MDLabel(halign="left", theme_text_color="Hint")
+        self.time_label = MDLabel(halign="right", theme_text_color="Hint")
+        datetime_layout.add_widget(self.date_label)
+        datetime_layout.add_widget(self.time_label)
+        record_card.add_widget(datetime_layout)
+
+        # Buttons
+        btn_layout = MDBoxLayout(orientation="horizontal", spacing=20, size_hint_y=None, height=40)
+        edit_btn = MDRaisedButton(text="Edit", on_release=lambda x: self.screen.edit_reminder(self.reminder_index))
+        delete_btn = MDFlatButton(text="Delete", on_release=lambda x: self.screen.delete_reminder(self.reminder_index))
+        btn_layout.add_widget(edit_btn)
+        btn_layout.add_widget(delete_btn)
+        record_card.add_widget(btn_layout)
+
+        self.add_widget(record_card)
+
+        # Separator line
+        self.add_widget(MDBoxLayout(size_hint_y=None, height=1, md_bg_color=(0.6, 0.6, 0.6, 1)))
+
+    def refresh_view_attrs(self, rv, index, data):
+        self.screen = data["screen"]
+        self.reminder_index = data["reminder_index"]
+        self.medicine_label.text = data["medicine"]
+        self.date_label.text = f"Date: {data['date']}"
+        self.time_label.text = f"Time: {data['time']}"
+        return super().refresh_view_attrs(rv, index, data)
 
-DATA_FILE = os.path.join("data", "reminders.json")
 
 class ViewRemindersScreen(MDScreen):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         self.delete_dialog = None
+        self.build_ui()
 
     def on_pre_enter(self, *args):
-        self.load_reminders()
-
-    def load_reminders(self):
-        self.clear_widgets()
+        # The current list stays up until the data is loaded
+        App.get_running_app().store.when_loaded(self.load_reminders)
 
+    def build_ui(self):
         anchor_layout = AnchorLayout(anchor_x="center", anchor_y="center", size_hint=(1, 1))
 
         main_card = MDCard(
@@ -43,77 +100,27 @@ class ViewRemindersScreen(MDScreen):
             theme_text_color="Primary"
         ))
 
-        scroll = MDScrollView(size_hint=(1, None), height=350)
-        list_layout = MDBoxLayout(orientation="vertical", spacing=10, size_hint_y=None)
-        list_layout.bind(minimum_height=list_layout.setter("height"))
+        self.empty_label = MDLabel(
+            text="No reminders yet.",
+            halign="center",
+            theme_text_color="Hint",
+            size_hint_y=None,
+            height=0,
+            opacity=0
+        )
+        main_card.add_widget(self.empty_label)
 
-        reminders = []
-        if os.path.exists(DATA_FILE):
-            with open(DATA_FILE, "r") as f:
-                try:
-                    reminders = json.load(f)
-                except json.JSONDecodeError:
-                    reminders = []
-
-        def parse_datetime(reminder):
-            try:
-                return datetime.strptime(f"{reminder.get('date', '')} {reminder.get('time', '')}", "%Y-%m-%d %I:%M %p")
-            except:
-                return datetime.min
-
-        reminders = sorted(reminders, key=parse_datetime)
-
-        if reminders:
-            for idx, reminder in enumerate(reminders):
-                medicine = reminder.get("medicine", "Unknown")
-                time = reminder.get("time", "Unknown")
-                date = reminder.get("date", "Unknown")
-
-                record_card = MDCard(
-                    padding=10,
-                    orientation="vertical",
-                    radius=[10],
-                    size_hint_y=None,
-                    height=140,
-                    spacing=10
-                )
-
-                # Medicine name
-                record_card.add_widget(MDLabel(
-                    text=medicine,
-                    halign="center",
-                    theme_text_color="Primary",
-                    font_style="Subtitle1"
-                ))
-
-                # Date and time layout
-                datetime_layout = MDBoxLayout(orientation="horizontal", spacing=10, size_hint_y=None, height=30)
-                datetime_layout.add_widget(MDLabel(text=f"Date: {date}", halign="left", theme_text_color="Hint"))
-                datetime_layout.add_widget(MDLabel(text=f"Time: {time}", halign="right", theme_text_color="Hint"))
-                record_card.add_widget(datetime_layout)
-
-                # Buttons
-                btn_layout = MDBoxLayout(orientation="horizontal", spacing=20, size_hint_y=None, height=40)
-                edit_btn = MDRaisedButton(text="Edit", on_release=lambda x, i=idx: self.edit_reminder(i))
-                delete_btn = MDFlatButton(text="Delete", on_release=lambda x, i=idx: self.delete_reminder(i))
-                btn_layout.add_widget(edit_btn)
-                btn_layout.add_widget(delete_btn)
-                record_card.add_widget(btn_layout)
-
-                list_layout.add_widget(record_card)
-
-                # Separator line
-                separator = MDBoxLayout(size_hint_y=None, height=1, md_bg_color=(0.6, 0.6, 0.6, 1))
-                list_layout.add_widget(separator)
-        else:
-            list_layout.add_widget(MDLabel(
-                text="No reminders yet.",
-                halign="center",
-                theme_text_color="Hint"
-            ))
-
-        scroll.add_widget(list_layout)
-        main_card.add_widget(scroll)
+        self.rv = RecycleView(size_hint=(1, None), height=350, viewclass=ReminderRow)
+        list_layout = RecycleBoxLayout(
+            orientation="vertical",
+            spacing=10,
+            size_hint_y=None,
+            default_size=(None, ROW_HEIGHT),
+            default_size_hint=(1, None)
+        )
+        list_layout.bind(minimum_height=list_layout.setter("height"))
+        self.rv.add_widget(list_layout)
+        main_card.add_widget(self.rv)
 
         back_btn = MDRaisedButton(
             text="Back",
@@ -126,21 +133,44 @@ class ViewRemindersScreen(MDScreen):
         anchor_layout.add_widget(main_card)
         self.add_widget(anchor_layout)
 
+    def load_reminders(self):
+        reminders = App.get_running_app().store.reminders()
+
+        def sort_key(idx):
+            at = reminder_minutes(reminders[idx])
+            return at if at is not None else -1
+
+        # Sort positions rather than copies so Edit/Delete act on the stored index
+        order = sorted(range(len(reminders)), key=sort_key)
+
+        data = []
+        for idx in order:
+            reminder = reminders[idx]
+            medicine = reminder.get("medicine", "Unknown")
+            if reminder.get("repeat"):
+                medicine = f"{medicine} ({describe_rule(reminder['repeat'])})"
+            data.append({
+                "screen": self,
+                "reminder_index": idx,
+                "medicine": medicine,
+                "date": reminder.get("date", "Unknown"),
+                "time": reminder.get("time", "Unknown"),
+            })
+        self.rv.data = data
+
+        self.empty_label.opacity = 0 if data else 1
+        self.empty_label.height = 0 if data else 30
+
     def edit_reminder(self, index):
         App.get_running_app().root.edit_index = index
         App.get_running_app().root.switch("edit_reminder")
 
     def delete_reminder(self, index):
-        if not os.path.exists(DATA_FILE):
+        store = App.get_running_app().store
+        if store.get_reminder(index) is None:
             return
 
-        with open(DATA_FILE, "r") as f:
-            reminders = json.load(f)
-
-        removed = reminders.pop(index)
-
-        with open(DATA_FILE, "w") as f:
-            json.dump(reminders, f, indent=4)
+        removed = store.delete_reminder(index)
 
         self.show_delete_dialog(removed.get("medicine", "Reminder"))
         self.load_reminders()
@@ -0,0 +1,33 @@
+from events import Timer
+
+# Seconds to collect settings/tracker changes before writing them out
+FLUSH_DELAY = 1.5
+
+
+class WriteBehind:
+    # Collects "this needs saving" requests and runs each pending save once,
+    # either when the batch window closes or when flush() is called
+    # (app pause/stop). Saving the same thing twice in one window only keeps
+    # the latest request.
+    def __init__(self, schedule=None, delay=FLUSH_DELAY):
+        # schedule(callback, delay) -> event with cancel(), e.g. Clock.schedule_once.
+        # Without one every request is written straight away.
+        self.timer = Timer(schedule) if schedule else None
+        self.delay = delay
+        self.pending = {}
+        self.flush_count = 0
+
+    def mark_dirty(self, name, save):
+        self.pending[name] = save
+        if self.timer is None:
+            self.flush()
+        elif not self.timer.pending:
+            self.timer.start(lambda *args: self.flush(), self.delay)
+
+    def flush(self):
+        if self.timer is not None:
+            self.timer.cancel()
+        pending, self.pending = self.pending, {}
+        for save in pending.values():
+            save()
+            self.flush_count += 1